@@ -1,9 +1,40 @@
+import argparse
+import bisect
+import copy
 import csv
 import datetime as dt
-from collections import defaultdict
+import hashlib
+import itertools
+import io
+import json
+import mmap
+import os
+import re
+import shutil
+import sys
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache, partial
+from collections import defaultdict, deque
+from collections.abc import Mapping
 from pathlib import Path
 import tkinter as tk
-from tkinter import messagebox, ttk
+from tkinter import filedialog, messagebox, ttk
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+try:
+    import numpy
+except ImportError:  # optional: bulk occupancy queries fall back to plain int bitmasks
+    numpy = None
 
 
 APP_TITLE = "TutorRen Management"
@@ -14,9 +45,38 @@ APP_MINSIZE = (1280, 720)
 DATA_DIR = Path(__file__).resolve().parent / "data"
 EXPORT_DIR = DATA_DIR / "exports"
 EMAIL_LOG = DATA_DIR / "email_log.txt"
+SQLITE_PATH = DATA_DIR / "tutorren.db"
 
 DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-TIME_SLOTS = [f"{hour:02d}:00" for hour in range(8, 21)]
+# Sessions start at any HH:MM and last any number of minutes inside opening hours; TIME_SLOTS is the half-hour grid
+# the schedule picker and the occupancy bitmasks work on.
+DAY_START, DAY_END = 8 * 60, 21 * 60
+SLOT_MINUTES = 30
+DEFAULT_DURATION = 60
+DURATIONS = ("30", "45", "60", "90", "120")
+TIME_SLOTS = [f"{minutes // 60:02d}:{minutes % 60:02d}" for minutes in range(DAY_START, DAY_END, SLOT_MINUTES)]
+
+# "csv" rewrites a dataset's CSV on every edit (new rows are copied onto the end of the old bytes), "journal" appends edits to a per-dataset journal instead,
+# and "sqlite" keeps every dataset in one local database file.
+STORAGE_MODE = os.environ.get("TUTORREN_STORAGE", "csv")
+JOURNAL_COMPACT_MIN_ENTRIES = 64
+JOURNAL_COMPACT_RATIO = 0.5
+JOURNAL_COMPACT_BYTES = 4 * 1024 * 1024
+# The desktop app groups edits made within this many seconds into one write per dataset.
+WRITE_BEHIND_SECONDS = 0.75
+# How many changed keys each cached dataset remembers for views catching up on edits (see CachedDataset.changed_since).
+CHANGE_LOG_LIMIT = 4096
+# Data lists keep this many rows above and below the visible ones in the Treeview; the rest are never inserted.
+LIST_BUFFER_ROWS = 40
+# Threads parsing datasets for the UI, and how often (in ms) the Tk loop checks them for finished work.
+LOADER_WORKERS = 2
+LOADER_POLL_MS = 30
+# Search terms first seen since the search vocabulary was last sorted are scanned one by one until there are this many.
+SEARCH_UNSORTED_TERMS = 512
+# How many prefixes' matching rows the search index keeps while someone types.
+SEARCH_CACHED_PREFIXES = 16
+# Data lists show this many rows per page; the virtual window scrolls within the page.
+PAGE_ROWS = 500
 
 
 # ---------- Theming ----------
@@ -145,9 +205,9 @@ class ScrollableFrame(ttk.Frame):
 # ---------- Data spec & file setup ----------
 DATA_SPECS = {
     "users": {"filename": "users.csv", "headers": ["username", "password", "role"], "unique": "username"},
-    "tutors": {"filename": "tutors.csv", "headers": ["id", "name", "email", "subjects"], "unique": "id"},
-    "students": {"filename": "students.csv", "headers": ["id", "name", "email", "year"], "unique": "id"},
-    "classes": {"filename": "classes.csv", "headers": ["id", "title", "tutor_id", "student_id", "schedule"], "unique": "id"},
+    "tutors": {"filename": "tutors.csv", "headers": ["id", "name", "email", "subjects"], "unique": "id", "id_prefix": "T"},
+    "students": {"filename": "students.csv", "headers": ["id", "name", "email", "year"], "unique": "id", "id_prefix": "S"},
+    "classes": {"filename": "classes.csv", "headers": ["id", "title", "tutor_id", "student_id", "schedule", "duration", "start_date", "end_date", "interval", "exceptions"], "unique": "id", "id_prefix": "C", "indexes": ["tutor_id", "student_id", "schedule"]},
 }
 
 # Ensure CSV files exist with headers
@@ -181,73 +241,2169 @@ def is_valid_email(value: str) -> bool:
     return True
 
 
+def split_values(value) -> list[str]:
+    # "Math;Physics", "Math, Physics" or a JSON list.
+    if isinstance(value, (list, tuple)):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in str(value or "").replace(",", ";").split(";") if item.strip()]
+
+
 def escape_pdf_text(text: str) -> str:
     return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
 
 
+# ---------- Typed records ----------
+# Week numbering for "every N weeks" classes without a start date: weeks counted from Monday 3 January 2000.
+RECURRENCE_EPOCH = dt.date(2000, 1, 3).toordinal()
+RECURRENCE_FIELDS = ("start_date", "end_date", "interval", "exceptions")
+
+
+@lru_cache(maxsize=4096)
+def parse_date(text: str) -> dt.date | None:
+    try:
+        return dt.date.fromisoformat(text) if text else None
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=1024)
+def parse_exceptions(text: str) -> frozenset[int]:
+    return frozenset(day.toordinal() for day in map(parse_date, split_values(text)) if day)
+
+
+def date_span(start_date: str, end_date: str) -> tuple[int, int]:
+    # Date ordinals; a blank start or end leaves that side open.
+    first, last = parse_date(start_date), parse_date(end_date)
+    return (first.toordinal() if first else 1, last.toordinal() if last else dt.date.max.toordinal())
+
+
+@lru_cache(maxsize=4096)
+def schedule_slot(schedule: str) -> tuple[int, int]:
+    """Parses "Mon 10:00" into (day index, minutes past midnight); unknown days sort after Sunday.
+
+    Cached, so every class at the same time shares one tuple instead of carrying its own.
+    """
+    day, _, time = schedule.partition(" ")
+    try:
+        day_index = DAYS.index(day)
+    except ValueError:
+        day_index = len(DAYS)
+    hour, _, minute = time.partition(":")
+    try:
+        return (day_index, int(hour) * 60 + int(minute or 0))
+    except ValueError:
+        return (day_index, 0)
+
+
+def duration_minutes(duration: str) -> int:
+    return int(duration) if duration.isdigit() and int(duration) > 0 else DEFAULT_DURATION
+
+
+def format_minutes(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def check_session(schedule: str, duration: str = "") -> str:
+    """Returns an error message when ``schedule`` ("Mon 10:30") plus ``duration`` minutes is not bookable, else ""."""
+    day, _, time = schedule.partition(" ")
+    hour, _, minute = time.partition(":")
+    if day not in DAYS or len(hour) != 2 or len(minute) != 2 or not (hour + minute).isdigit() or int(minute) > 59:
+        return f"Schedule {schedule!r} is not a day and HH:MM start time."
+    if duration and (not duration.isdigit() or int(duration) < 1):
+        return "Duration must be a whole number of minutes."
+    start = schedule_slot(schedule)[1]
+    if start < DAY_START or start + duration_minutes(duration) > DAY_END:
+        return f"Sessions must fall between {format_minutes(DAY_START)} and {format_minutes(DAY_END)}."
+    return ""
+
+
+class Record(Mapping):
+    """A row kept in ``__slots__`` instead of a per-row dict, with a read-only mapping view over the dataset headers.
+
+    Repeated values (ids, roles, subjects, schedules) are interned so every row shares one string object.
+    """
+    __slots__ = ()
+    fields: tuple[str, ...] = ()
+    interned: frozenset[str] = frozenset()
+
+    def __init__(self, row):
+        for field in self.fields:
+            value = row.get(field)
+            value = "" if value is None else str(value)
+            setattr(self, field, sys.intern(value) if field in self.interned else value)
+
+    def __getitem__(self, key):
+        if key not in self.fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __len__(self):
+        return len(self.fields)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+class UserRecord(Record):
+    fields = tuple(DATA_SPECS["users"]["headers"])
+    interned = frozenset({"role"})
+    __slots__ = fields
+
+
+class TutorRecord(Record):
+    fields = tuple(DATA_SPECS["tutors"]["headers"])
+    interned = frozenset({"subjects"})
+    __slots__ = fields
+
+
+class StudentRecord(Record):
+    fields = tuple(DATA_SPECS["students"]["headers"])
+    # Year levels repeat across thousands of rows; interned, they are shared and still written back exactly as typed ("07" stays "07").
+    interned = frozenset({"year"})
+    __slots__ = fields
+
+
+class ClassRecord(Record):
+    """A weekly class starting at ``schedule`` and lasting ``duration`` minutes (blank = DEFAULT_DURATION). It runs
+    from start_date to end_date (either may be blank for open-ended), every ``interval`` weeks (blank = weekly),
+    except on the ``exceptions`` dates."""
+    fields = tuple(DATA_SPECS["classes"]["headers"])
+    interned = frozenset({"title", "tutor_id", "student_id", "schedule", "duration", "start_date", "end_date", "interval"})
+    __slots__ = fields + ("slot",)
+
+    def __init__(self, row):
+        super().__init__(row)
+        self.slot = schedule_slot(self.schedule)
+
+    def minutes(self) -> tuple[int, int]:
+        """The session as a [start, end) range of minutes past midnight."""
+        return self.slot[1], self.slot[1] + duration_minutes(self.duration)
+
+    def active_range(self) -> tuple[int, int]:
+        return date_span(self.start_date, self.end_date)
+
+    def meets_on(self, day: dt.date) -> bool:
+        if self.slot[0] != day.weekday():
+            return False
+        ordinal = day.toordinal()
+        first, last = self.active_range()
+        if not first <= ordinal <= last:
+            return False
+        interval = int(self.interval) if self.interval.isdigit() else 1
+        if interval > 1:
+            anchor = first + (self.slot[0] - dt.date.fromordinal(first).weekday()) % 7 if self.start_date else RECURRENCE_EPOCH + self.slot[0]
+            if (ordinal - anchor) // 7 % interval:
+                return False
+        return ordinal not in parse_exceptions(self.exceptions)
+
+
+RECORD_TYPES = {"users": UserRecord, "tutors": TutorRecord, "students": StudentRecord, "classes": ClassRecord}
+
+
+def make_record(name, row) -> Record:
+    record_type = RECORD_TYPES[name]
+    return row if isinstance(row, record_type) else record_type(row)
+
+
+# ---------- Secondary indexes ----------
+def schedule_day(schedule: str) -> str:
+    return schedule.partition(" ")[0]
+
+
+# Indexes named after a field also serve where={field: value} filters in iter_records().
+SECONDARY_INDEXES = {
+    "classes": {
+        "tutor_id": lambda row: row.get("tutor_id"),
+        "student_id": lambda row: row.get("student_id"),
+    },
+}
+
+
+# ---------- Slot occupancy ----------
+OCCUPANCY_VERSIONS = itertools.count(1)
+SLOT_SCHEDULES = [f"{day} {time}" for day in DAYS for time in TIME_SLOTS]
+SLOT_BITS = {schedule: bit for bit, schedule in enumerate(SLOT_SCHEDULES)}
+FULL_WEEK = (1 << len(SLOT_SCHEDULES)) - 1
+DAY_MASKS = {day: sum(1 << SLOT_BITS[f"{day} {time}"] for time in TIME_SLOTS) for day in DAYS}
+
+
+@lru_cache(maxsize=4096)
+def session_cells(schedule: str, duration: str = "") -> int:
+    """Bitmask of the grid cells a session overlaps. Any part outside opening hours is clipped off."""
+    day, start = schedule_slot(schedule)
+    end = min(start + duration_minutes(duration), DAY_END)
+    start = max(start, DAY_START)
+    if day >= len(DAYS) or end <= start:
+        return 0
+    first = (start - DAY_START) // SLOT_MINUTES
+    last = (end - DAY_START - 1) // SLOT_MINUTES
+    return ((1 << (last - first + 1)) - 1) << (day * len(TIME_SLOTS) + first)
+
+
+@lru_cache(maxsize=None)
+def run_starts(length: int) -> int:
+    # Bits where a run of ``length`` cells starts and still ends on the same day.
+    per_day = (1 << max(len(TIME_SLOTS) - length + 1, 0)) - 1
+    return sum(per_day << day * len(TIME_SLOTS) for day in range(len(DAYS)))
+
+
+def free_starts(free: int, length: int) -> int:
+    """Start bits of every run of ``length`` consecutive free cells within one day."""
+    starts = free
+    for shift in range(1, length):
+        starts &= free >> shift
+    return starts & run_starts(length)
+
+
+class OccupancyIndex:
+    """Weekly occupancy of every tutor and student as an int bitmask over the DAYS x TIME_SLOTS grid.
+
+    A class sets the bit of every half-hour cell its session overlaps (``session_cells``), so a clear bit always means
+    free, while a set bit only says some class touches that cell in some term; IntervalIndex has the exact minute
+    ranges and ``term_cells`` the cells of the classes overlapping one term.
+    ``clashes`` counts the extra classes on an already-set bit, so removing one of two clashing classes leaves the bit
+    set. With NumPy installed the same bits are mirrored into a bool matrix per field, which the bulk queries read in
+    one vectorized pass. Minutes outside opening hours are not tracked.
+    """
+    fields = ("tutor_id", "student_id")
+
+    def __init__(self):
+        # Drawn from one process-wide counter, so a reloaded index never repeats an earlier index's version.
+        self.version = next(OCCUPANCY_VERSIONS)
+        self.masks: dict[str, dict[str, int]] = {field: {} for field in self.fields}
+        self.clashes: dict[tuple[str, str, int], int] = {}
+        self.rows: dict[str, dict[str, int]] = {field: {} for field in self.fields}
+        self.grids = {field: numpy.zeros((16, len(SLOT_SCHEDULES)), dtype=bool) for field in self.fields} if numpy else None
+
+    def add(self, key, row):
+        self._count(row, 1)
+
+    def remove(self, key, row):
+        self._count(row, -1)
+
+    def _count(self, row, delta):
+        cells = session_cells(row["schedule"], row["duration"])
+        while cells:
+            low = cells & -cells
+            cells ^= low
+            self._count_bit(row, low.bit_length() - 1, delta)
+
+    def _count_bit(self, row, bit, delta):
+        for field in self.fields:
+            participant = row[field]
+            busy = self.masks[field].get(participant, 0) >> bit & 1
+            if delta > 0 and not busy:
+                self._toggle(field, participant, bit, True)
+                continue
+            slot = (field, participant, bit)
+            extra = self.clashes.get(slot, 0)
+            if delta > 0:
+                self.clashes[slot] = extra + 1
+            elif extra > 1:
+                self.clashes[slot] = extra - 1
+            elif extra:
+                del self.clashes[slot]
+            elif busy:
+                self._toggle(field, participant, bit, False)
+
+    def _toggle(self, field, participant, bit, busy: bool):
+        self.version = next(OCCUPANCY_VERSIONS)
+        masks = self.masks[field]
+        mask = masks.get(participant, 0) ^ (1 << bit)
+        if mask:
+            masks[participant] = mask
+        else:
+            masks.pop(participant, None)
+        if self.grids is not None:
+            rows = self.rows[field]
+            if participant not in rows:
+                if len(rows) == len(self.grids[field]):
+                    self.grids[field] = numpy.concatenate([self.grids[field], numpy.zeros_like(self.grids[field])])
+                rows[participant] = len(rows)
+            self.grids[field][rows[participant], bit] = busy
+
+    def busy(self, tutor_id=None, student_id=None) -> int:
+        return self.masks["tutor_id"].get(tutor_id, 0) | self.masks["student_id"].get(student_id, 0)
+
+    def is_free(self, schedule, tutor_id=None, student_id=None, duration="") -> bool:
+        return not self.busy(tutor_id, student_id) & session_cells(schedule, duration)
+
+    def free_at(self, schedule, tutor_ids, student_id=None, duration="") -> list[str]:
+        """The tutors among ``tutor_ids`` that are free for the session at ``schedule`` (and only if ``student_id`` is too)."""
+        cells = session_cells(schedule, duration)
+        tutor_ids = list(tutor_ids)
+        if self.masks["student_id"].get(student_id, 0) & cells:
+            return []
+        if self.grids is None:
+            masks = self.masks["tutor_id"]
+            return [tutor_id for tutor_id in tutor_ids if not masks.get(tutor_id, 0) & cells]
+        columns = [bit for bit in range(cells.bit_length()) if cells >> bit & 1]
+        taken = self._grid_rows("tutor_id", tutor_ids)[:, columns].any(axis=1).tolist()
+        return [tutor_id for tutor_id, busy in zip(tutor_ids, taken) if not busy]
+
+    def free_counts(self, tutor_ids, student_id=None) -> list[int]:
+        """How many week slots each of ``tutor_ids`` has free together with ``student_id``."""
+        tutor_ids = list(tutor_ids)
+        if self.grids is None:
+            masks = self.masks["tutor_id"]
+            student = self.masks["student_id"].get(student_id, 0)
+            return [(FULL_WEEK & ~(masks.get(tutor_id, 0) | student)).bit_count() for tutor_id in tutor_ids]
+        busy = self._grid_rows("tutor_id", tutor_ids) | self._grid_rows("student_id", [student_id])
+        return (~busy).sum(axis=1).tolist()
+
+    def _grid_rows(self, field, participants: list):
+        # Participants that never had a class have no row yet; they come back all free.
+        rows = self.rows[field]
+        index = numpy.array([rows.get(participant, -1) for participant in participants], dtype=numpy.intp)
+        selected = self.grids[field][numpy.maximum(index, 0)]
+        selected[index < 0] = False
+        return selected
+
+
+# ---------- Session intervals ----------
+class IntervalIndex:
+    """Every tutor's and student's sessions per weekday as (start, end, sequence) minute ranges sorted by start.
+
+    ``longest`` bounds the length of any range added to a list, so the ranges overlapping [start, end) all begin in
+    (start - longest, end) and two bisects find them for arbitrary minutes, however dense the calendar. Removing a
+    range leaves the bound as it was, which only widens that window.
+    """
+    fields = ("tutor_id", "student_id")
+
+    def __init__(self):
+        self.lists: dict[tuple[str, str, int], list[tuple[int, int, int]]] = {}
+        self.longest: dict[tuple[str, str, int], int] = {}
+        self.entries: dict = {}
+        self.rows: dict[int, ClassRecord] = {}
+        self.sequence = itertools.count()
+
+    def add(self, key, row):
+        day = row.slot[0]
+        if day >= len(DAYS):
+            return
+        start, end = row.minutes()
+        entry = (start, end, next(self.sequence))
+        for field in self.fields:
+            slot = (field, row[field], day)
+            bisect.insort(self.lists.setdefault(slot, []), entry)
+            self.longest[slot] = max(self.longest.get(slot, 0), end - start)
+        self.entries[key] = (day, entry)
+        self.rows[entry[2]] = row
+
+    def remove(self, key, row):
+        found = self.entries.pop(key, None)
+        if found is None:
+            return
+        day, entry = found
+        stored = self.rows.pop(entry[2])
+        for field in self.fields:
+            slot = (field, stored[field], day)
+            ranges = self.lists[slot]
+            index = bisect.bisect_left(ranges, entry)
+            if index < len(ranges) and ranges[index] == entry:
+                del ranges[index]
+            if not ranges:
+                del self.lists[slot]
+                del self.longest[slot]
+
+    def overlapping(self, field, participant, day: int, start: int, end: int):
+        """Yields the classes with ``field`` == ``participant`` whose session on weekday ``day`` overlaps [start, end)."""
+        slot = (field, participant, day)
+        ranges = self.lists.get(slot)
+        if not ranges:
+            return
+        low = bisect.bisect_right(ranges, (start - self.longest[slot], float("inf")))
+        high = bisect.bisect_left(ranges, (end,))
+        for index in range(low, high):
+            _, stop, sequence = ranges[index]
+            if stop > start:
+                yield self.rows[sequence]
+
+    def conflict(self, schedule, duration, tutor_id, student_id, start_date="", end_date="", exclude_key=None) -> ClassRecord | None:
+        """A class that has the tutor or student in an overlapping session during the start_date..end_date term, if any."""
+        day, start = schedule_slot(schedule)
+        end = start + duration_minutes(duration)
+        first, last = date_span(start_date, end_date)
+        for field, participant in (("tutor_id", tutor_id), ("student_id", student_id)):
+            for lesson in self.overlapping(field, participant, day, start, end):
+                lesson_first, lesson_last = lesson.active_range()
+                if lesson.get("id") != exclude_key and lesson_first <= last and first <= lesson_last:
+                    return lesson
+        return None
+
+
+# ---------- Recurring sessions ----------
+def clean_recurrence(record: dict) -> str:
+    """Normalises a class's recurrence fields in place; returns an error message, or "" when they are valid."""
+    values = {field: str(record.get(field) or "").strip() for field in RECURRENCE_FIELDS}
+    dates = {}
+    for field, label in (("start_date", "Start date"), ("end_date", "End date")):
+        if values[field] and parse_date(values[field]) is None:
+            return f"{label} {values[field]!r} is not a date (YYYY-MM-DD)."
+        dates[field] = parse_date(values[field])
+    if dates["start_date"] and dates["end_date"] and dates["end_date"] < dates["start_date"]:
+        return "End date is before the start date."
+    interval = values["interval"]
+    if interval and (not interval.isdigit() or int(interval) < 1):
+        return "Every N weeks must be a whole number of at least 1."
+    skipped = []
+    for value in split_values(values["exceptions"]):
+        if parse_date(value) is None:
+            return f"Skip date {value!r} is not a date (YYYY-MM-DD)."
+        skipped.append(parse_date(value).isoformat())
+    record.update(
+        start_date=dates["start_date"].isoformat() if dates["start_date"] else "",
+        end_date=dates["end_date"].isoformat() if dates["end_date"] else "",
+        interval="" if interval in ("", "1") else str(int(interval)),
+        exceptions=";".join(sorted(set(skipped))),
+    )
+    return ""
+
+
+class OccurrenceIndex:
+    """Classes bucketed by weekday and sorted by first and by last date, so the classes that can meet on a date are
+    found by bisect.
+
+    Range queries walk the dates in the range and never expand a class's whole term.
+    """
+    def __init__(self):
+        self.by_day: list[list[tuple[int, int]]] = [[] for _ in DAYS]
+        self.by_end: list[list[tuple[int, int]]] = [[] for _ in DAYS]
+        self.entries: dict = {}
+        self.rows: dict[int, ClassRecord] = {}
+        self.sequence = itertools.count()
+
+    def add(self, key, row):
+        day = row.slot[0]
+        if day >= len(DAYS):
+            return
+        first, last = row.active_range()
+        sequence = next(self.sequence)
+        bisect.insort(self.by_day[day], (first, sequence))
+        bisect.insort(self.by_end[day], (last, sequence))
+        self.entries[key] = (day, first, last, sequence)
+        self.rows[sequence] = row
+
+    def remove(self, key, row):
+        found = self.entries.pop(key, None)
+        if found is None:
+            return
+        day, first, last, sequence = found
+        for bucket, entry in ((self.by_day[day], (first, sequence)), (self.by_end[day], (last, sequence))):
+            index = bisect.bisect_left(bucket, entry)
+            if index < len(bucket) and bucket[index] == entry:
+                del bucket[index]
+        del self.rows[sequence]
+
+    def on_date(self, day: dt.date) -> list[ClassRecord]:
+        ordinal = day.toordinal()
+        starting, ending = self.by_day[day.weekday()], self.by_end[day.weekday()]
+        started = bisect.bisect_right(starting, (ordinal, float("inf")))
+        ended = bisect.bisect_left(ending, (ordinal,))
+        # Walks the shorter side: the classes already started or the classes not yet ended; meets_on checks both ends.
+        if started <= len(ending) - ended:
+            candidates = itertools.islice(starting, started)
+        else:
+            candidates = itertools.islice(ending, ended, None)
+        meeting = [self.rows[sequence] for _, sequence in candidates]
+        return sorted((row for row in meeting if row.meets_on(day)), key=lambda row: row.slot)
+
+    def between(self, start: dt.date, end: dt.date):
+        """Yields (start time, class) for every meeting from ``start`` to ``end`` inclusive, in time order."""
+        day = start
+        while day <= end:
+            for row in self.on_date(day):
+                yield dt.datetime.combine(day, dt.time()) + dt.timedelta(minutes=row.slot[1]), row
+            day += dt.timedelta(days=1)
+
+
+# ---------- Text search ----------
+# Fields each data list's search box looks in.
+SEARCH_FIELDS = {
+    "users": ("username", "role"),
+    "tutors": ("id", "name", "email", "subjects"),
+    "students": ("id", "name", "email"),
+    "classes": ("id", "title", "schedule", "tutor_id", "student_id"),
+}
+SEARCH_TERM = re.compile(r"[^\W\d_]+|\d+")
+
+
+def search_terms(text: str) -> list[str]:
+    """Case-folded runs of letters or digits: "S-00042" gives ["s", "00042"], "ana42@mail.com" ["ana", "42", "mail", "com"]."""
+    return SEARCH_TERM.findall(text.casefold())
+
+
+def row_search_terms(row, fields) -> set[str]:
+    terms = set()
+    for field in fields:
+        terms.update(search_terms(row.get(field) or ""))
+    return terms
+
+
+def matches_search(name, row, query: str) -> bool:
+    """Whether ``row`` would be among ``query``'s search results, without asking the index."""
+    terms = row_search_terms(row, SEARCH_FIELDS[name])
+    return all(any(term.startswith(prefix) for term in terms) for prefix in search_terms(query))
+
+
+class TextIndex:
+    """Word-prefix index over some fields of a dataset: each query term must start one of a row's terms.
+
+    Changes are only noted as they happen and folded in on the next search, so a bulk load costs nothing until the
+    list is first searched and later edits re-index just the rows they touched.
+    """
+    def __init__(self, fields):
+        self.fields = fields
+        self.postings: dict[str, set[str]] = {}
+        # Each row's terms as "\x1fterm\x1fterm", so whether a row has a term starting with p is one substring test.
+        self.row_text: dict[str, str] = {}
+        # Rows by the first character of their terms: one-letter queries are the commonest and the widest.
+        self.initials: dict[str, set[str]] = defaultdict(set)
+        # Sorted for prefix ranges; may still hold terms no row uses any more, which postings filters out.
+        self.vocabulary: list[str] = []
+        self.unsorted: set[str] = set()
+        self.dirty: dict[str, Record | None] = {}
+        # Rows matching recent prefixes, kept up to date like postings, so typing one more letter narrows a known set.
+        self.prefixes: dict[str, set[str]] = {}
+        # Load order of each key, for returning a few matches in file order without walking the whole dataset.
+        self.position: dict[str, int] = {}
+        self.positions = itertools.count()
+
+    def add(self, key, row):
+        self.dirty[key] = row
+        if key not in self.position:
+            self.position[key] = next(self.positions)
+
+    def remove(self, key, row):
+        self.dirty[key] = None
+
+    def catch_up(self):
+        if len(self.dirty) > SEARCH_CACHED_PREFIXES * 16:
+            self.prefixes.clear()
+        for key, row in self.dirty.items():
+            old_terms = self.row_text.pop(key, "").split("\x1f")[1:]
+            for term in old_terms:
+                keys = self.postings[term]
+                keys.discard(key)
+                if not keys:
+                    del self.postings[term]
+            terms = set()
+            if row is not None:
+                terms = row_search_terms(row, self.fields)
+                self.row_text[key] = "".join("\x1f" + term for term in terms)
+            old_initials = {term[0] for term in old_terms}
+            new_initials = {term[0] for term in terms}
+            for initial in old_initials - new_initials:
+                self.initials[initial].discard(key)
+            for initial in new_initials - old_initials:
+                self.initials[initial].add(key)
+            for term in terms:
+                keys = self.postings.get(term)
+                if keys is None:
+                    self.postings[term] = {key}
+                    self.unsorted.add(term)
+                else:
+                    keys.add(key)
+            for prefix, keys in self.prefixes.items():
+                if any(term.startswith(prefix) for term in terms):
+                    keys.add(key)
+                elif old_terms:
+                    keys.discard(key)
+        self.dirty.clear()
+        if len(self.unsorted) > SEARCH_UNSORTED_TERMS:
+            self.vocabulary = sorted(self.postings)
+            self.unsorted.clear()
+
+    def term_range(self, prefix: str) -> tuple[int, int]:
+        return (
+            bisect.bisect_left(self.vocabulary, prefix),
+            bisect.bisect_left(self.vocabulary, prefix[:-1] + chr(ord(prefix[-1]) + 1)),
+        )
+
+    def narrow(self, keys, prefix: str) -> set[str]:
+        needle = "\x1f" + prefix
+        row_text = self.row_text
+        return {key for key in keys if needle in row_text[key]}
+
+    def starting_with(self, prefix: str) -> set[str]:
+        if len(prefix) == 1:
+            return self.initials.get(prefix, set())
+        found = self.prefixes.get(prefix)
+        if found is not None:
+            return found
+        start, end = self.term_range(prefix)
+        shorter = self.initials.get(prefix[0]) if len(prefix) == 2 else self.prefixes.get(prefix[:-1])
+        if shorter is not None and len(shorter) < end - start:
+            # Checking the rows of the previous keystroke is cheaper than gathering this many terms' postings.
+            found = self.narrow(shorter, prefix)
+        else:
+            # filter(None, ...) skips terms that have dropped out of postings since the vocabulary was sorted.
+            found = set().union(*filter(None, map(self.postings.get, self.vocabulary[start:end])))
+            found.update(*filter(None, (self.postings.get(term) for term in self.unsorted if term.startswith(prefix))))
+        if len(self.prefixes) >= SEARCH_CACHED_PREFIXES:
+            del self.prefixes[next(iter(self.prefixes))]
+        self.prefixes[prefix] = found
+        return found
+
+    def search(self, query: str) -> set[str] | None:
+        """Keys of the rows matching every term of ``query``; None when the query has no terms at all.
+
+        The set may be one the index keeps, so callers must not modify it.
+        """
+        prefixes = sorted(set(search_terms(query)), key=len, reverse=True)
+        if not prefixes:
+            return None
+        self.catch_up()
+        # The longest term is usually the rarest; the others then only filter what it found.
+        found = self.starting_with(prefixes[0])
+        for prefix in prefixes[1:]:
+            if not found:
+                break
+            start, end = self.term_range(prefix)
+            if len(prefix) == 1 or prefix in self.prefixes or len(found) > end - start:
+                found = found & self.starting_with(prefix)
+            else:
+                found = self.narrow(found, prefix)
+        return found
+
+
+# ---------- Sorted lists ----------
+def natural_key(text: str) -> tuple:
+    """Orders text case-insensitively with digit runs as numbers, so "S-9" sorts before "S-10"."""
+    parts = re.split(r"(\d+)", text.casefold())
+    return tuple(int(part) if index % 2 else part for index, part in enumerate(parts))
+
+
+def sort_key(name, column, row) -> tuple:
+    """How a data list orders ``column``: classes by their parsed start and length, anything else in natural order."""
+    if name == "classes" and column == "schedule":
+        return row.slot
+    if name == "classes" and column == "duration":
+        return (duration_minutes(row.duration),)
+    return natural_key(row.get(column) or "")
+
+
+class SortIndex:
+    """Row keys in the order of each column a list has been sorted on.
+
+    A column is keyed and sorted the first time it is asked for; after that edits move just the rows they touched,
+    and the key list handed out is reused until the next change.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.entries: dict[str, list[tuple]] = {}
+        self.row_keys: dict[str, dict[str, tuple]] = {}
+        self.orders: dict[str, list[str]] = {}
+        self.dirty: dict[str, Record | None] = {}
+
+    def add(self, key, row):
+        if self.entries:
+            self.dirty[key] = row
+
+    def remove(self, key, row):
+        if self.entries:
+            self.dirty[key] = None
+
+    def catch_up(self):
+        if not self.dirty:
+            return
+        self.orders.clear()
+        for column in list(self.entries):
+            entries = self.entries[column]
+            if len(self.dirty) * 16 > len(entries):
+                # A bulk change: sorting afresh when the column is next asked for is cheaper than moving each row.
+                del self.entries[column], self.row_keys[column]
+                continue
+            row_keys = self.row_keys[column]
+            for key, row in self.dirty.items():
+                old = row_keys.pop(key, None)
+                if old is not None:
+                    del entries[bisect.bisect_left(entries, (old, key))]
+                if row is not None:
+                    row_keys[key] = sort_key(self.name, column, row)
+                    bisect.insort(entries, (row_keys[key], key))
+        self.dirty.clear()
+
+    def ordered(self, column, records) -> list[str]:
+        """Keys of ``records`` ascending by ``column``, ties by key. The list is the index's own; do not modify it."""
+        self.catch_up()
+        order = self.orders.get(column)
+        if order is None:
+            entries = self.entries.get(column)
+            if entries is None:
+                row_keys = self.row_keys[column] = {key: sort_key(self.name, column, row) for key, row in records.items()}
+                entries = self.entries[column] = sorted(zip(row_keys.values(), row_keys))
+            order = self.orders[column] = [key for _, key in entries]
+        return order
+
+
+# ---------- Subject index ----------
+def subject_key(subject: str) -> str:
+    return " ".join(subject.split()).casefold()
+
+
+def clean_subjects(text) -> str:
+    """Joins a tutor's subjects with ";" as typed, dropping blanks and case-insensitive repeats."""
+    subjects = {}
+    for subject in split_values(text):
+        subjects.setdefault(subject_key(subject), " ".join(subject.split()))
+    return ";".join(subjects.values())
+
+
+class SubjectIndex:
+    """Inverted index from case-folded subject to the ids of the tutors teaching it.
+
+    ``names`` keeps the first spelling seen for each subject for display.
+    """
+    def __init__(self):
+        self.tutors: dict[str, set[str]] = {}
+        self.names: dict[str, str] = {}
+
+    def add(self, key, row):
+        for subject in split_values(row["subjects"]):
+            folded = subject_key(subject)
+            self.tutors.setdefault(folded, set()).add(key)
+            self.names.setdefault(folded, " ".join(subject.split()))
+
+    def remove(self, key, row):
+        for subject in split_values(row["subjects"]):
+            folded = subject_key(subject)
+            tutors = self.tutors.get(folded)
+            if tutors is None:
+                continue
+            tutors.discard(key)
+            if not tutors:
+                del self.tutors[folded]
+                del self.names[folded]
+
+    def teaching(self, subject: str) -> set[str]:
+        """Ids of the tutors teaching ``subject``; the set is the index's own, so callers must not modify it."""
+        return self.tutors.get(subject_key(subject), set())
+
+    def subjects(self) -> list[str]:
+        return sorted(self.names.values(), key=str.casefold)
+
+
+# Structures that are not simple value -> rows maps but are kept up to date with each dataset the same way.
+DERIVED_INDEXES = {
+    "users": {"search": partial(TextIndex, SEARCH_FIELDS["users"]), "order": partial(SortIndex, "users")},
+    "tutors": {"subjects": SubjectIndex, "search": partial(TextIndex, SEARCH_FIELDS["tutors"]), "order": partial(SortIndex, "tutors")},
+    "students": {"search": partial(TextIndex, SEARCH_FIELDS["students"]), "order": partial(SortIndex, "students")},
+    "classes": {
+        "occupancy": OccupancyIndex,
+        "intervals": IntervalIndex,
+        "occurrences": OccurrenceIndex,
+        "search": partial(TextIndex, SEARCH_FIELDS["classes"]),
+        "order": partial(SortIndex, "classes"),
+    },
+}
+
+
+# ---------- Dataset metadata ----------
+def row_digest(name, row) -> int:
+    text = "\x1f".join(str(row.get(header, "")) for header in DATA_SPECS[name]["headers"])
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def json_ready(value):
+    # Tuples become lists so in-memory signatures compare equal to ones read back from a sidecar.
+    return json.loads(json.dumps(value))
+
+
+def empty_metadata(name) -> dict:
+    meta = {"rows": 0, "hash": 0, "modified": None, "next_id": None, "signature": None}
+    if name == "classes":
+        meta["by_day"] = {}
+        meta["tutor_load"] = {}
+    return meta
+
+
+def count_row(name, meta: dict, row, sign: int):
+    """Adds (sign=1) or removes (sign=-1) one row's contribution to the maintained counters."""
+    meta["rows"] += sign
+    # XOR of per-row digests: order-independent, so an edit only swaps one digest out and another in.
+    meta["hash"] ^= row_digest(name, row)
+    if name == "classes":
+        for counter, value in (("by_day", schedule_day(row.get("schedule") or "")), ("tutor_load", row.get("tutor_id"))):
+            counts = meta[counter]
+            counts[value] = counts.get(value, 0) + sign
+            if counts[value] <= 0:
+                del counts[value]
+
+
+def build_metadata(name, rows) -> dict:
+    meta = empty_metadata(name)
+    for row in rows:
+        count_row(name, meta, row, 1)
+    return meta
+
+
+# ---------- Record store ----------
+def write_csv_atomic(path: Path, headers, rows):
+    # Write next to the target and rename over it, so a crash never leaves a half-written CSV behind.
+    temp_path = path.with_name(path.name + ".tmp")
+    write_csv_file(temp_path, headers, rows)
+    os.replace(temp_path, path)
+
+
+def write_csv_file(path: Path, headers, rows):
+    with path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=headers)
+        writer.writeheader()
+        writer.writerows(rows)
+        fh.flush()
+        os.fsync(fh.fileno())
+
+
+def write_text_atomic(path: Path, text: str):
+    # A temp file of its own, since metadata sidecars are saved without the cross-process write lock and two app
+    # instances may rebuild the same one at once.
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=path.parent, prefix=path.name + ".", suffix=".tmp", delete=False) as fh:
+        try:
+            fh.write(text)
+            fh.flush()
+            os.fsync(fh.fileno())
+            # NamedTemporaryFile creates the file owner-only; keep the permissions a plain open() would have given.
+            os.chmod(fh.name, 0o644)
+        except BaseException:
+            fh.close()
+            os.unlink(fh.name)
+            raise
+    os.replace(fh.name, path)
+
+
+@contextmanager
+def file_lock(path: Path):
+    """Holds an exclusive advisory lock on ``path`` (created if needed) for the duration of the block."""
+    with path.open("a+b") as fh:
+        if fcntl:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        else:
+            fh.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def file_signature(path: Path) -> tuple[int, int, int] | None:
+    try:
+        info = path.stat()
+    except FileNotFoundError:
+        return None
+    return (info.st_mtime_ns, info.st_size, info.st_ino)
+
+
+def index_records(name, rows) -> dict:
+    # Unique key -> row, in file order. Rows repeating an existing key are kept under (key, line) so a rewrite never drops them.
+    unique_field = DATA_SPECS[name]["unique"]
+    records = {}
+    for line, row in enumerate(rows):
+        row = make_record(name, row)
+        key = row.get(unique_field)
+        records[(key, line) if key in records else key] = row
+    return records
+
+
+def split_where(name, where) -> tuple[dict, dict, object]:
+    """Splits a where= argument into column equality terms, secondary-index terms and a row predicate."""
+    if where is None:
+        return {}, {}, None
+    if callable(where):
+        return {}, {}, where
+    headers = DATA_SPECS[name]["headers"]
+    column_terms = {field: value for field, value in where.items() if field in headers}
+    index_terms = {field: value for field, value in where.items() if field not in headers}
+    for field in index_terms:
+        if field not in SECONDARY_INDEXES.get(name, {}):
+            raise KeyError(f"{name} has no field or index called {field!r}.")
+    return column_terms, index_terms, None
+
+
+def row_matches(name, row, index_terms: dict, predicate) -> bool:
+    indexes = SECONDARY_INDEXES.get(name, {})
+    if any(indexes[field](row) != value for field, value in index_terms.items()):
+        return False
+    return predicate is None or bool(predicate(row))
+
+
+def project(name, row, fields):
+    if fields is None:
+        return make_record(name, row)
+    return {field: row.get(field, "") for field in fields}
+
+
+def rename_record(records: dict, key, new_key, row):
+    # Rebuilds the mapping so the renamed row keeps its position.
+    renamed = {(new_key if existing == key else existing): (row if existing == key else value) for existing, value in records.items()}
+    records.clear()
+    records.update(renamed)
+
+
+class OffsetIndex:
+    """Maps each row's unique key to the byte range holding that row in a CSV file, so one row can be read via mmap
+    without parsing the rest of the file.
+
+    The index grows incrementally while the file only grows past the last indexed row, and is rebuilt from scratch
+    when the file is replaced or rewritten in place.
+    """
+    def __init__(self, path: Path, key_field: str):
+        self.path = path
+        self.key_field = key_field
+        self.headers: list[str] = []
+        self.offsets: dict[str, tuple[int, int]] = {}
+        self.stamp: tuple | None = None
+        self.tail: tuple[int, bytes] | None = None
+
+    def refresh(self):
+        info = self.path.stat()
+        stamp = (info.st_ino, info.st_size, info.st_mtime_ns)
+        if stamp == self.stamp:
+            return
+        if self.stamp and stamp[0] == self.stamp[0] and stamp[1] > self.stamp[1] and self._tail_intact():
+            self._scan(self.stamp[1])
+        else:
+            self.headers, self.offsets, self.tail = [], {}, None
+            self._scan(0)
+        self.stamp = (info.st_ino, self.stamp[1], info.st_mtime_ns)
+
+    def carry_over(self, old_stamp):
+        # The file was replaced by a copy of its old bytes plus new rows; keep the index and scan only the new rows.
+        if self.stamp is None or self.stamp[:2] != old_stamp[:2]:
+            return
+        info = self.path.stat()
+        self.stamp = (info.st_ino, self.stamp[1], None)
+
+    def _tail_intact(self) -> bool:
+        if self.tail is None:
+            return True
+        start, raw = self.tail
+        with self.path.open("rb") as fh:
+            fh.seek(start)
+            return fh.read(len(raw)) == raw
+
+    def _scan(self, offset: int):
+        with self.path.open("rb") as fh:
+            fh.seek(offset)
+            if offset == 0:
+                header = fh.readline()
+                self.headers = next(csv.reader([header.decode("utf-8-sig")]), [])
+                offset = len(header)
+            if self.key_field not in self.headers:
+                self.stamp = (None, offset, None)
+                return
+            position = self.headers.index(self.key_field)
+            pending, start = b"", offset
+            for line in fh:
+                if not pending:
+                    start = offset
+                pending += line
+                offset += len(line)
+                if pending.count(b'"') % 2:
+                    continue  # a quoted field runs onto the next line
+                key = self._key(pending, position)
+                if key is not None:
+                    self.offsets.setdefault(key, (start, offset))
+                    self.tail = (start, pending)
+                pending = b""
+        # An unterminated quoted row at the end is picked up by the next scan once the rest of it is written.
+        self.stamp = (None, offset - len(pending), None)
+
+    @staticmethod
+    def _key(raw: bytes, position: int) -> str | None:
+        if not raw.strip():
+            return None
+        if position == 0 and not raw.startswith(b'"'):
+            return raw.split(b",", 1)[0].rstrip(b"\r\n").decode("utf-8")
+        values = next(csv.reader(io.StringIO(raw.decode("utf-8"), newline="")), [])
+        return values[position] if position < len(values) else None
+
+    def read(self, key) -> dict[str, str] | None:
+        self.refresh()
+        span = self.offsets.get(key)
+        if span is None:
+            return None
+        with self.path.open("rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            raw = mapped[span[0]:span[1]]
+        values = next(csv.reader(io.StringIO(raw.decode("utf-8"), newline="")), [])
+        return dict(zip(self.headers, values))
+
+
+class CsvBackend:
+    """Stores each dataset in its CSV file.
+
+    With ``journal=True`` single-row changes are appended to ``<dataset>.journal`` as JSON lines and replayed over the
+    CSV on load; ``RecordStore`` folds the journal back into the CSV once it passes the compaction thresholds.
+    """
+    def __init__(self, data_dir: Path, journal: bool = False):
+        self.data_dir = data_dir
+        self.journal = journal
+        self.journal_entries: dict[str, int] = {}
+        self.offset_indexes: dict[str, OffsetIndex] = {}
+        self.upgrade_headers()
+
+    def upgrade_headers(self):
+        """Rewrites any dataset CSV whose header predates columns since added to DATA_SPECS, filling them in blank."""
+        for name, spec in DATA_SPECS.items():
+            path = self.path(name)
+            if not path.exists() or self._header(path) == spec["headers"]:
+                continue
+            with self.write_lock(name):
+                header = self._header(path)
+                if not header or header == spec["headers"] or not set(header) <= set(spec["headers"]):
+                    continue
+                with path.open("r", newline="", encoding="utf-8") as fh:
+                    rows = list(csv.DictReader(fh))
+                write_csv_atomic(path, spec["headers"], rows)
+
+    @staticmethod
+    def _header(path: Path) -> list[str]:
+        with path.open("r", newline="", encoding="utf-8") as fh:
+            return next(csv.reader(fh), [])
+
+    def path(self, name) -> Path:
+        return self.data_dir / DATA_SPECS[name]["filename"]
+
+    def journal_path(self, name) -> Path:
+        return self.path(name).with_suffix(".journal")
+
+    def signature(self, name):
+        return (file_signature(self.path(name)), file_signature(self.journal_path(name)))
+
+    def load(self, name) -> dict:
+        with self.path(name).open("r", newline="", encoding="utf-8") as fh:
+            records = index_records(name, csv.DictReader(fh))
+        self.journal_entries[name] = self._replay_journal(name, records)
+        return records
+
+    def iter_rows(self, name, column_terms: dict, index_terms: dict, predicate, fields):
+        """Streams matching rows straight from the file; column terms are tested on the raw CSV fields before any dict is built."""
+        changes = self._journal_changes(name)
+        unique_field = DATA_SPECS[name]["unique"]
+        with self.path(name).open("r", newline="", encoding="utf-8") as fh:
+            reader = csv.reader(fh)
+            headers = next(reader, [])
+            positions = {field: idx for idx, field in enumerate(headers)}
+            key_position = positions.get(unique_field)
+            tests = [(positions.get(field), value) for field, value in column_terms.items()]
+            for values in reader:
+                if changes and key_position is not None and key_position < len(values) and values[key_position] in changes:
+                    row = changes.pop(values[key_position])
+                    if row is None or any(row.get(field, "") != value for field, value in column_terms.items()):
+                        continue
+                elif any((values[position] if position is not None and position < len(values) else "") != value for position, value in tests):
+                    continue
+                else:
+                    row = dict(zip(headers, values))
+                if row_matches(name, row, index_terms, predicate):
+                    yield project(name, row, fields)
+        for row in changes.values():
+            if row is None or any(row.get(field, "") != value for field, value in column_terms.items()):
+                continue
+            if row_matches(name, row, index_terms, predicate):
+                yield project(name, row, fields)
+
+    def read_one(self, name, key) -> dict[str, str] | None:
+        """Reads the row stored under ``key`` through the dataset's byte-offset index (journal changes take precedence)."""
+        changes = self._journal_changes(name)
+        row = changes[key] if key in changes else self.offset_index(name).read(key)
+        return make_record(name, row) if row is not None else None
+
+    def count_keys(self, name, keys) -> int:
+        """How many of ``keys`` are stored, answered from the offset index and journal without reading any row."""
+        changes = self._journal_changes(name)
+        index = self.offset_index(name)
+        index.refresh()
+        return sum(1 for key in keys if (changes[key] is not None if key in changes else key in index.offsets))
+
+    def offset_index(self, name) -> OffsetIndex:
+        index = self.offset_indexes.get(name)
+        if index is None:
+            index = self.offset_indexes[name] = OffsetIndex(self.path(name), DATA_SPECS[name]["unique"])
+        return index
+
+    def _journal_changes(self, name) -> dict:
+        # Net effect of the journal: key -> latest row, or None where the key was deleted or renamed away.
+        changes: dict = {}
+        path = self.journal_path(name)
+        if not path.exists():
+            return changes
+        unique_field = DATA_SPECS[name]["unique"]
+        with path.open("r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                key = entry.get("key")
+                if entry.get("op") == "delete":
+                    changes[key] = None
+                    continue
+                row = entry["row"]
+                new_key = row.get(unique_field)
+                if new_key != key:
+                    changes[key] = None
+                changes[new_key] = row
+        return changes
+
+    def _replay_journal(self, name, records: dict) -> int:
+        path = self.journal_path(name)
+        if not path.exists():
+            return 0
+        unique_field = DATA_SPECS[name]["unique"]
+        entries = 0
+        with path.open("r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-append; everything before it is intact.
+                    continue
+                entries += 1
+                key = entry.get("key")
+                if entry.get("op") == "delete":
+                    records.pop(key, None)
+                    continue
+                row = make_record(name, entry["row"])
+                new_key = row.get(unique_field)
+                if new_key != key and key in records:
+                    rename_record(records, key, new_key, row)
+                else:
+                    records[new_key] = row
+        return entries
+
+    def write(self, name, ops, records: dict):
+        """Persists a batch of ("insert" | "upsert", key, row) / ("delete", key, None) changes in one write."""
+        if self.journal:
+            self._journal(name, *({"op": op, "key": key, "row": row} if row is not None else {"op": op, "key": key} for op, key, row in ops))
+        elif ops and all(op == "insert" for op, _, _ in ops) and self.path(name).exists():
+            self._append(name, [records[key] for _, key, _ in ops])
+        else:
+            self.replace(name, records.values())
+
+    def _append(self, name, rows):
+        # Still a temp file + rename, but the old bytes are copied verbatim so existing rows keep their offsets.
+        path = self.path(name)
+        temp_path = path.with_name(path.name + ".tmp")
+        old_stamp = (path.stat().st_ino, path.stat().st_size)
+        shutil.copyfile(path, temp_path)
+        with temp_path.open("r+b") as fh:
+            fh.seek(0, os.SEEK_END)
+            if fh.tell():
+                fh.seek(-1, os.SEEK_END)
+                if fh.read(1) != b"\n":
+                    fh.write(b"\r\n")
+            text = io.StringIO(newline="")
+            csv.DictWriter(text, fieldnames=DATA_SPECS[name]["headers"]).writerows(rows)
+            fh.write(text.getvalue().encode("utf-8"))
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(temp_path, path)
+        if name in self.offset_indexes:
+            self.offset_indexes[name].carry_over(old_stamp)
+
+    def replace(self, name, rows):
+        write_csv_atomic(self.path(name), DATA_SPECS[name]["headers"], rows)
+        self.journal_path(name).unlink(missing_ok=True)
+        self.journal_entries[name] = 0
+
+    def _journal(self, name, *entries: dict):
+        with self.journal_path(name).open("a", encoding="utf-8") as fh:
+            fh.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries))
+            fh.flush()
+            os.fsync(fh.fileno())
+        self.journal_entries[name] = self.journal_entries.get(name, 0) + len(entries)
+
+    def metadata_path(self, name) -> Path:
+        return self.path(name).with_suffix(".meta.json")
+
+    def modified(self, name) -> str:
+        mtime = max(path.stat().st_mtime for path in (self.path(name), self.journal_path(name)) if path.exists())
+        return dt.datetime.fromtimestamp(mtime).isoformat(timespec="seconds")
+
+    def peek_sequence(self, prefix) -> int | None:
+        try:
+            last = json.loads((self.data_dir / "sequences.json").read_text(encoding="utf-8")).get(prefix)
+        except (OSError, ValueError, AttributeError):
+            return None
+        return last if isinstance(last, int) else None
+
+    def allocate_ids(self, prefix, count, recover, resync=False) -> int:
+        """Reserves ``count`` numbers for ``prefix`` in data/sequences.json and returns the first one."""
+        path = self.data_dir / "sequences.json"
+        with file_lock(path.with_suffix(".lock")):
+            try:
+                sequences = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                sequences = {}
+            if not isinstance(sequences, dict):
+                sequences = {}
+            last = sequences.get(prefix)
+            if not isinstance(last, int) or resync:
+                last = max(last if isinstance(last, int) else 0, recover())
+            sequences[prefix] = last + count
+            write_text_atomic(path, json.dumps(sequences, indent=2, sort_keys=True))
+        return last + 1
+
+    def leftover_journal(self, name) -> bool:
+        """A journal left by a journal-mode session, which has to be folded in before plain CSV writes resume."""
+        return not self.journal and bool(self.journal_entries.get(name))
+
+    def needs_compaction(self, name, row_count: int) -> bool:
+        entries = self.journal_entries.get(name, 0)
+        if not entries:
+            return False
+        if not self.journal:
+            return True
+        if entries < JOURNAL_COMPACT_MIN_ENTRIES:
+            return False
+        journal_size = (file_signature(self.journal_path(name)) or (0, 0, 0))[1]
+        return journal_size >= JOURNAL_COMPACT_BYTES or entries >= JOURNAL_COMPACT_RATIO * max(row_count, 1)
+
+    def journal_size(self, name) -> int:
+        return (file_signature(self.journal_path(name)) or (0, 0, 0))[1]
+
+    def write_lock(self, name):
+        return file_lock(self.path(name).with_suffix(".lock"))
+
+    def base_signature(self, name):
+        return file_signature(self.path(name))
+
+    def write_base(self, name, rows) -> Path:
+        """Writes a compacted copy of the dataset beside it; ``commit_base`` swaps it in."""
+        path = self.path(name)
+        staged = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        write_csv_file(staged, DATA_SPECS[name]["headers"], rows)
+        return staged
+
+    def commit_base(self, name, staged: Path, base_signature, folded_bytes: int) -> bool:
+        # Caller holds the write lock. If another process rewrote the CSV meanwhile, its version wins and ours is dropped.
+        if self.base_signature(name) != base_signature:
+            staged.unlink(missing_ok=True)
+            return False
+        os.replace(staged, self.path(name))
+        self.truncate_journal(name, folded_bytes)
+        return True
+
+    def truncate_journal(self, name, folded_bytes: int):
+        journal_path = self.journal_path(name)
+        tail = b""
+        if journal_path.exists():
+            with journal_path.open("rb") as fh:
+                fh.seek(folded_bytes)
+                tail = fh.read()
+        if tail:
+            temp_path = journal_path.with_name(journal_path.name + ".tmp")
+            temp_path.write_bytes(tail)
+            os.replace(temp_path, journal_path)
+        else:
+            journal_path.unlink(missing_ok=True)
+        self.journal_entries[name] = tail.count(b"\n")
+
+
+class SqliteBackend:
+    """Stores every dataset as a table in one SQLite file, with tables and indexes generated from DATA_SPECS."""
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.create_schema()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # One connection per thread: a reader on the UI thread never runs inside a loader or flush thread's open
+        # transaction, and with WAL it sees the last committed version while that transaction runs.
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.db_path, isolation_level=None)
+        return connection
+
+    def create_schema(self):
+        with self.transaction() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS dataset_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+            db.execute("CREATE TABLE IF NOT EXISTS sequences (prefix TEXT PRIMARY KEY, last INTEGER NOT NULL)")
+            for name, spec in DATA_SPECS.items():
+                columns = ", ".join(f'"{header}" TEXT' for header in spec["headers"])
+                db.execute(f'CREATE TABLE IF NOT EXISTS "{name}" ({columns})')
+                existing = {row[1] for row in db.execute(f'PRAGMA table_info("{name}")')}
+                for header in spec["headers"]:
+                    if header not in existing:
+                        db.execute(f'ALTER TABLE "{name}" ADD COLUMN "{header}" TEXT')
+                db.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "{name}_{spec["unique"]}" ON "{name}" ("{spec["unique"]}")')
+                for column in spec.get("indexes", ()):
+                    db.execute(f'CREATE INDEX IF NOT EXISTS "{name}_{column}" ON "{name}" ("{column}")')
+                db.execute("INSERT OR IGNORE INTO dataset_versions (name, version) VALUES (?, 0)", (name,))
+
+    @contextmanager
+    def transaction(self):
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.connection
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+
+    def write_lock(self, name):
+        # One lock for the whole database; each write is also its own IMMEDIATE transaction.
+        return file_lock(self.db_path.with_suffix(".lock"))
+
+    def signature(self, name):
+        row = self.connection.execute("SELECT version FROM dataset_versions WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _bump(self, db, name):
+        db.execute("UPDATE dataset_versions SET version = version + 1 WHERE name = ?", (name,))
+
+    def load(self, name) -> dict:
+        headers = DATA_SPECS[name]["headers"]
+        columns = ", ".join(f'"{header}"' for header in headers)
+        cursor = self.connection.execute(f'SELECT {columns} FROM "{name}" ORDER BY rowid')
+        return index_records(name, ({header: value or "" for header, value in zip(headers, row)} for row in cursor))
+
+    def read_one(self, name, key) -> dict[str, str] | None:
+        spec = DATA_SPECS[name]
+        columns = ", ".join(f'"{header}"' for header in spec["headers"])
+        values = self.connection.execute(f'SELECT {columns} FROM "{name}" WHERE "{spec["unique"]}" = ? LIMIT 1', (key,)).fetchone()
+        return make_record(name, {header: value or "" for header, value in zip(spec["headers"], values)}) if values else None
+
+    def count_keys(self, name, keys) -> int:
+        """How many of ``keys`` are stored, counted on the unique index (in batches under SQLite's parameter limit)."""
+        unique_field = DATA_SPECS[name]["unique"]
+        keys = list(keys)
+        total = 0
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            query = f'SELECT COUNT(*) FROM "{name}" WHERE "{unique_field}" IN ({", ".join("?" * len(batch))})'
+            total += self.connection.execute(query, batch).fetchone()[0]
+        return total
+
+    def iter_rows(self, name, column_terms: dict, index_terms: dict, predicate, fields):
+        """Streams matching rows with column terms and, when no Python-side filter needs the full row, the projection pushed into SQL."""
+        headers = list(fields) if fields is not None and not index_terms and predicate is None else DATA_SPECS[name]["headers"]
+        columns = ", ".join(f'"{header}"' for header in headers) or "1"
+        clause = " AND ".join(f'"{field}" = ?' for field in column_terms)
+        query = f'SELECT {columns} FROM "{name}"' + (f" WHERE {clause}" if clause else "") + " ORDER BY rowid"
+        # A separate connection so a long-running stream never holds the writer's connection mid-transaction.
+        connection = sqlite3.connect(self.db_path)
+        try:
+            for values in connection.execute(query, list(column_terms.values())):
+                row = {header: value or "" for header, value in zip(headers, values)}
+                if row_matches(name, row, index_terms, predicate):
+                    yield project(name, row, fields)
+        finally:
+            connection.close()
+
+    def write(self, name, ops, records: dict):
+        spec = DATA_SPECS[name]
+        assignments = ", ".join(f'"{header}" = ?' for header in spec["headers"])
+        with self.transaction() as db:
+            for op, key, row in ops:
+                if op == "delete":
+                    db.execute(f'DELETE FROM "{name}" WHERE "{spec["unique"]}" = ?', (key,))
+                    continue
+                values = [row.get(header, "") for header in spec["headers"]]
+                if not db.execute(f'UPDATE "{name}" SET {assignments} WHERE "{spec["unique"]}" = ?', values + [key]).rowcount:
+                    self._insert(db, name, [row])
+            self._bump(db, name)
+
+    def _insert(self, db, name, rows) -> int:
+        headers = DATA_SPECS[name]["headers"]
+        columns = ", ".join(f'"{header}"' for header in headers)
+        placeholders = ", ".join("?" for _ in headers)
+        before = db.total_changes
+        db.executemany(
+            # A plain INSERT, so a repeated key fails the transaction instead of silently dropping the row.
+            f'INSERT INTO "{name}" ({columns}) VALUES ({placeholders})',
+            ([row.get(header, "") for header in headers] for row in rows),
+        )
+        return db.total_changes - before
+
+    def replace(self, name, rows) -> int:
+        with self.transaction() as db:
+            db.execute(f'DELETE FROM "{name}"')
+            inserted = self._insert(db, name, rows)
+            self._bump(db, name)
+        return inserted
+
+    def metadata_path(self, name) -> Path:
+        return self.db_path.with_name(f"{self.db_path.stem}.{name}.meta.json")
+
+    def modified(self, name) -> str:
+        return dt.datetime.fromtimestamp(self.db_path.stat().st_mtime).isoformat(timespec="seconds")
+
+    def peek_sequence(self, prefix) -> int | None:
+        row = self.connection.execute("SELECT last FROM sequences WHERE prefix = ?", (prefix,)).fetchone()
+        return row[0] if row else None
+
+    def allocate_ids(self, prefix, count, recover, resync=False) -> int:
+        with self.transaction() as db:
+            row = db.execute("SELECT last FROM sequences WHERE prefix = ?", (prefix,)).fetchone()
+            last = row[0] if row else 0
+            if not row or resync:
+                last = max(last, recover())
+            db.execute("INSERT OR REPLACE INTO sequences (prefix, last) VALUES (?, ?)", (prefix, last + count))
+        return last + 1
+
+    def leftover_journal(self, name) -> bool:
+        return False
+
+    def needs_compaction(self, name, row_count: int) -> bool:
+        return False
+
+
+class SecondaryIndex:
+    """Maps a value derived from each row to the rows that produce it, as {value: {record key: row}}."""
+    def __init__(self, key_func):
+        self.key_func = key_func
+        self.buckets: dict = {}
+
+    def add(self, key, row):
+        value = self.key_func(row)
+        if value is not None:
+            self.buckets.setdefault(value, {})[key] = row
+
+    def remove(self, key, row):
+        value = self.key_func(row)
+        bucket = self.buckets.get(value)
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del self.buckets[value]
+
+    def lookup(self, value) -> list[dict[str, str]]:
+        return list(self.buckets.get(value, {}).values())
+
+
+DATASET_GENERATIONS = itertools.count(1)
+
+
+class CachedDataset:
+    """One loaded dataset with its indexes. ``generation`` moves on with every change and ``changes`` logs the keys
+    changed at each generation, so a view can apply just those rows instead of re-reading the dataset."""
+    def __init__(self, name, signature, records: dict):
+        self.name = name
+        self.signature = signature
+        self.records = records
+        # Drawn from one process-wide counter, so a reloaded dataset never repeats an earlier copy's generation.
+        self.generation = self.log_floor = next(DATASET_GENERATIONS)
+        self.changes: deque[tuple[int, str]] = deque()
+        self.indexes = {index: SecondaryIndex(key_func) for index, key_func in SECONDARY_INDEXES.get(name, {}).items()}
+        self.indexes.update({index: factory() for index, factory in DERIVED_INDEXES.get(name, {}).items()})
+        for key, row in records.items():
+            for index in self.indexes.values():
+                index.add(key, row)
+
+    def put(self, key, row):
+        previous = self.records.get(key)
+        for index in self.indexes.values():
+            if previous is not None:
+                index.remove(key, previous)
+            index.add(key, row)
+        self.records[key] = row
+        self.touch(key)
+
+    def drop(self, key):
+        row = self.records.pop(key)
+        for index in self.indexes.values():
+            index.remove(key, row)
+        self.touch(key)
+
+    def rename(self, key, new_key, row):
+        previous = self.records[key]
+        for index in self.indexes.values():
+            index.remove(key, previous)
+            index.add(new_key, row)
+        rename_record(self.records, key, new_key, row)
+        self.touch(key, new_key)
+
+    def touch(self, *keys):
+        self.generation = next(DATASET_GENERATIONS)
+        for key in keys:
+            self.changes.append((self.generation, key))
+        while len(self.changes) > CHANGE_LOG_LIMIT:
+            self.log_floor = self.changes.popleft()[0]
+
+    def changed_since(self, generation) -> list | None:
+        """Keys changed after ``generation``, oldest first and each once; None when this copy cannot tell because
+        ``generation`` predates the load or has dropped out of the log."""
+        if generation == self.generation:
+            return []
+        if generation is None or generation < self.log_floor:
+            return None
+        keys = []
+        for changed_at, key in reversed(self.changes):
+            if changed_at <= generation:
+                break
+            keys.append(key)
+        return list(dict.fromkeys(reversed(keys)))
+
+    def apply(self, op, key, row) -> tuple:
+        """Applies one change and returns (row it replaced or removed, row it stored)."""
+        if op == "delete":
+            previous = self.records.get(key)
+            if previous is not None:
+                self.drop(key)
+            return previous, None
+        row = make_record(self.name, row)
+        new_key = row.get(DATA_SPECS[self.name]["unique"])
+        if new_key != key and key in self.records:
+            previous = self.records[key]
+            self.rename(key, new_key, row)
+        else:
+            previous = self.records.get(new_key)
+            self.put(new_key, row)
+        return previous, row
+
+
+class ConflictError(ValueError):
+    """Raised when a row was changed or removed by someone else after it was loaded for editing."""
+
+
+class RecordStore:
+    """Keeps parsed datasets in memory, indexed by their unique field, and reloads one only when its backend reports a change.
+
+    With ``write_delay`` set, changes land in memory at once and every change made to a dataset within that many seconds
+    is merged into a single backend write (write-behind). Call ``flush()`` to force pending changes to disk.
+
+    Writes hold the backend's per-dataset write lock (an advisory file lock), so several app instances can share data/:
+    under the lock the dataset is reloaded if its version moved, then changed and written.
+    """
+    def __init__(self, backend, write_delay: float | None = None):
+        self.backend = backend
+        self.write_delay = write_delay
+        self._cache: dict[str, CachedDataset] = {}
+        # One lock per dataset, so parsing or writing one never holds up readers of another.
+        self._locks = {name: threading.RLock() for name in DATA_SPECS}
+        self._compacting: set[str] = set()
+        self._pending: dict[str, list[tuple]] = {}
+        self._timers: dict[str, threading.Timer] = {}
+        self._metadata: dict[str, dict] = {}
+        self._write_locked: set[str] = set()
+        self.last_flush_error: BaseException | None = None
+        self.stats: dict[str, dict[str, int]] = {name: {"hits": 0, "misses": 0, "reloads": 0} for name in DATA_SPECS}
+
+    def records(self, name) -> dict:
+        with self._locks[name]:
+            signature = self.backend.signature(name)
+            cached = self._cache.get(name)
+            if cached and cached.signature == signature:
+                self.stats[name]["hits"] += 1
+                return cached.records
+            self.stats[name]["reloads" if cached else "misses"] += 1
+            records = self.backend.load(name)
+            cached = CachedDataset(name, signature, records)
+            if self._pending.get(name):
+                # Someone else changed the file while we had unsaved edits; layer them over the fresh copy, with the
+                # counters rebuilt from the fresh rows so the sidecar saved after the next write matches the file.
+                meta = self._metadata[name] = build_metadata(name, records.values())
+                meta["signature"] = json_ready(signature)
+                meta["modified"] = dt.datetime.now().isoformat(timespec="seconds")
+                self._pending[name] = self._replay(cached, self._pending[name], meta)
+            self._cache[name] = cached
+            if self.backend.leftover_journal(name):
+                # Plain CSV writes would ignore the journal, so it is folded in before anyone edits these rows.
+                if name not in self._compacting:
+                    self._compacting.add(name)
+                    self.compact(name)
+            elif self.backend.needs_compaction(name, len(records)):
+                self.compact_in_background(name)
+            return records
+
+    def changes_since(self, name, generation) -> tuple[int, list | None]:
+        """The dataset's current generation and the keys changed since ``generation`` (None: reload everything)."""
+        with self._locks[name]:
+            cached = self.dataset(name)
+            return cached.generation, cached.changed_since(generation)
+
+    def version(self, name):
+        """The dataset's version stamp: its file signature for CSV, a counter bumped by every write for SQLite."""
+        return json_ready(self.backend.signature(name))
+
+    @contextmanager
+    def write_lock(self, name):
+        # Re-entrant within this store: the thread holding the dataset's lock may already own its file lock.
+        with self._locks[name]:
+            if name in self._write_locked:
+                yield
+                return
+            with self.backend.write_lock(name):
+                self._write_locked.add(name)
+                try:
+                    yield
+                finally:
+                    self._write_locked.discard(name)
+
+    def rows(self, name) -> list[dict[str, str]]:
+        return list(self.records(name).values())
+
+    def get(self, name, key) -> dict[str, str] | None:
+        """Returns one row by unique key, from the cache when the dataset is loaded, otherwise reading only that row."""
+        with self._locks[name]:
+            cached = self._fresh(name)
+            if cached is not None:
+                self.stats[name]["hits"] += 1
+                return cached.records.get(key)
+            return self.backend.read_one(name, key)
+
+    def _fresh(self, name) -> CachedDataset | None:
+        cached = self._cache.get(name)
+        if cached is None or not (self._pending.get(name) or cached.signature == self.backend.signature(name)):
+            return None
+        return cached
+
+    def is_cached(self, name) -> bool:
+        # Deliberately lock-free: the UI thread asks this while a loader thread may hold the lock parsing the file.
+        return self._fresh(name) is not None
+
+    def generation(self, name) -> int | None:
+        """The cached dataset's generation, or None if it is not loaded or is stale; lock-free like is_cached."""
+        cached = self._fresh(name)
+        return None if cached is None else cached.generation
+
+    def contains(self, name, key) -> bool:
+        return key in self.records(name)
+
+    def dataset(self, name) -> CachedDataset:
+        with self._locks[name]:
+            self.records(name)
+            return self._cache[name]
+
+    def lookup(self, name, index, value) -> list[dict[str, str]]:
+        return self.dataset(name).indexes[index].lookup(value)
+
+    def sorted_rows(self, name, column, descending=False, query="") -> list[dict[str, str]]:
+        """Rows ordered by ``column`` (see sort_key), narrowed to ``query``'s matches when it has any terms."""
+        with self._locks[name]:
+            cached = self.dataset(name)
+            keys = cached.indexes["order"].ordered(column, cached.records)
+            if descending:
+                keys = keys[::-1]
+            matches = cached.indexes["search"].search(query) if query else None
+            if matches is not None:
+                keys = filter(matches.__contains__, keys)
+            return list(map(cached.records.__getitem__, keys))
+
+    def prepare_search(self, name):
+        """Brings the dataset's search index up to date, e.g. on a loader thread before the first keystroke needs it."""
+        with self._locks[name]:
+            self.dataset(name).indexes["search"].catch_up()
+
+    def count_present(self, name, keys) -> int:
+        """How many of the distinct ``keys`` are stored in ``name``: from the cache when it is loaded, otherwise in one
+        backend lookup that reads no rows."""
+        keys = set(keys)
+        with self._locks[name]:
+            cached = self._fresh(name)
+            if cached is not None:
+                return sum(1 for key in keys if key in cached.records)
+            return self.backend.count_keys(name, keys)
+
+    def read_locked(self, name, read):
+        """Returns ``read(dataset)`` computed under the dataset's lock. For worker threads: ``read`` must copy what it
+        needs, since the rows and indexes go on changing once the lock is released."""
+        with self._locks[name]:
+            return read(self.dataset(name))
+
+    def metadata_copy(self, name) -> dict:
+        """A copy of ``metadata(name)`` that later edits leave alone, so it can be read off the lock."""
+        with self._locks[name]:
+            return copy.deepcopy(self.metadata(name))
+
+    def prepare_sort(self, name, column):
+        """Sorts the dataset on ``column`` ahead of the list asking for it; see prepare_search."""
+        with self._locks[name]:
+            cached = self.dataset(name)
+            cached.indexes["order"].ordered(column, cached.records)
+
+    def search(self, name, query) -> list[dict[str, str]] | None:
+        """Rows matching ``query`` in file order, or None when the query holds nothing to search for."""
+        with self._locks[name]:
+            cached = self.dataset(name)
+            index = cached.indexes["search"]
+            keys = index.search(query)
+            if keys is None:
+                return None
+            if len(keys) == len(cached.records):
+                return list(cached.records.values())
+            if len(keys) * 8 < len(cached.records):
+                return [cached.records[key] for key in sorted(keys, key=index.position.__getitem__)]
+            return list(itertools.compress(cached.records.values(), map(keys.__contains__, cached.records)))
+
+    def iter_records(self, name, where=None, fields=None):
+        """Yields rows matching ``where`` (a {field or index: value} dict or a predicate), projected to ``fields``.
+
+        Rows come from the cache when the dataset is already loaded, using a secondary index where one matches;
+        otherwise they are streamed from the backend without loading the dataset into memory.
+        """
+        column_terms, index_terms, predicate = split_where(name, where)
+        unique_field = DATA_SPECS[name]["unique"]
+        with self._locks[name]:
+            cached = self._fresh(name)
+            if cached is not None:
+                candidates = self._candidates(cached, {**column_terms, **index_terms})
+            elif unique_field in column_terms:
+                row = self.backend.read_one(name, column_terms[unique_field])
+                candidates = [row] if row is not None else []
+            else:
+                candidates = None
+        if candidates is None:
+            yield from self.backend.iter_rows(name, column_terms, index_terms, predicate, fields)
+            return
+        for row in candidates:
+            if all(row.get(field) == value for field, value in column_terms.items()) and row_matches(name, row, index_terms, predicate):
+                yield project(name, row, fields)
+
+    def _candidates(self, cached: CachedDataset, terms: dict) -> list:
+        unique_field = DATA_SPECS[cached.name]["unique"]
+        if unique_field in terms:
+            row = cached.records.get(terms[unique_field])
+            return [row] if row is not None else []
+        for field, value in terms.items():
+            if field in cached.indexes:
+                return cached.indexes[field].lookup(value)
+        return list(cached.records.values())
+
+    def count(self, name, where=None) -> int:
+        if where is None:
+            with self._locks[name]:
+                cached = self._fresh(name)
+                if cached is not None:
+                    return len(cached.records)
+        return sum(1 for _ in self.iter_records(name, where, fields=()))
+
+    def first(self, name, where=None, fields=None):
+        return next(self.iter_records(name, where, fields), None)
+
+    def append(self, name, record):
+        self.append_many(name, [record])
+
+    def append_many(self, name, rows):
+        """Adds every row in one backend write (a single CSV append, journal write or SQLite transaction)."""
+        unique_field = DATA_SPECS[name]["unique"]
+        self._apply(name, [("insert", row.get(unique_field), dict(row)) for row in rows])
+
+    def update(self, name, key, record, expected=None):
+        """Replaces the row stored under ``key``. With ``expected`` (the row as it was loaded for editing) the change
+        is first checked against the latest stored row, under the write lock, raising ConflictError if the two differ."""
+        self._apply(name, [("upsert", key, dict(record))], {key: expected} if expected is not None else None)
+
+    def delete(self, name, key, expected=None):
+        """Removes the row stored under ``key``; ``expected`` is checked as in ``update``."""
+        self._apply(name, [("delete", key, None)], {key: expected} if expected is not None else None)
+
+    def _apply(self, name, ops, expected=None):
+        with self.write_lock(name):
+            cached = self.dataset(name)
+            for key, row in (expected or {}).items():
+                current = cached.records.get(key)
+                if current is None:
+                    raise ConflictError(f"{key} was deleted by someone else after you opened it.")
+                if dict(current) != dict(row):
+                    raise ConflictError(f"{key} was changed by someone else after you opened it. Open it again to see the latest version.")
+            meta = self.metadata(name)
+            ops = self._replay(cached, ops, meta)
+            meta["modified"] = dt.datetime.now().isoformat(timespec="seconds")
+            if self.write_delay is None:
+                timer = self._timers.pop(name, None)
+                if timer:
+                    timer.cancel()
+                queued = self._pending.pop(name, [])
+                try:
+                    self._write(name, queued + ops)
+                except BaseException:
+                    # As in flush(): changes queued earlier were already shown as saved, so they stay queued.
+                    if queued:
+                        self._pending[name] = queued + self._pending.get(name, [])
+                    raise
+                return
+            self._pending.setdefault(name, []).extend(ops)
+            if name not in self._timers:
+                timer = threading.Timer(self.write_delay, self._flush_in_background, args=(name,))
+                timer.daemon = True
+                self._timers[name] = timer
+                timer.start()
+
+    def _replay(self, cached: CachedDataset, ops, meta=None) -> list[tuple]:
+        # Applies ops to the cached rows; an "insert" whose key turned out to exist already is recorded as an upsert.
+        applied = []
+        for op in ops:
+            previous, row = cached.apply(*op)
+            if op[0] == "insert" and previous is not None:
+                op = ("upsert", *op[1:])
+            applied.append(op)
+            if meta is not None:
+                if previous is not None:
+                    count_row(cached.name, meta, previous, -1)
+                if row is not None:
+                    count_row(cached.name, meta, row, 1)
+        return applied
+
+    def _write(self, name, ops):
+        cached = self._cache[name]
+        try:
+            self.backend.write(name, ops, cached.records)
+        except BaseException:
+            # The cached rows already hold the change; drop them so the next read reflects what actually got stored.
+            self._cache.pop(name, None)
+            raise
+        cached.signature = self.backend.signature(name)
+        self._save_metadata(name)
+        if self.backend.needs_compaction(name, len(cached.records)):
+            self.compact_in_background(name)
+
+    def metadata(self, name) -> dict:
+        """Row count, content hash, last-modified time, next id and (for classes) per-day/per-tutor counters.
+
+        Read from the dataset's sidecar file without touching the data, unless the sidecar is missing or no longer
+        matches the data file, in which case it is rebuilt from the rows once.
+        """
+        with self._locks[name]:
+            signature = json_ready(self.backend.signature(name))
+            meta = self._metadata.get(name)
+            if meta is not None and (meta["signature"] == signature or self._pending.get(name)):
+                return meta
+            try:
+                meta = json.loads(self.backend.metadata_path(name).read_text(encoding="utf-8"))
+                meta["hash"] = int(meta["hash"], 16)
+            except (OSError, ValueError, KeyError, TypeError):
+                meta = None
+            if meta is None or meta.get("signature") != signature:
+                meta = build_metadata(name, self.records(name).values())
+                meta["modified"] = self.backend.modified(name)
+                self._metadata[name] = meta
+                self._save_metadata(name)
+            self._metadata[name] = meta
+            return meta
+
+    def _save_metadata(self, name):
+        meta = self._metadata.get(name)
+        if meta is None:
+            return
+        prefix = DATA_SPECS[name].get("id_prefix")
+        if prefix:
+            last = self.backend.peek_sequence(prefix)
+            meta["next_id"] = format_id(prefix, last + 1) if last is not None else None
+        meta["signature"] = json_ready(self.backend.signature(name))
+        write_text_atomic(self.backend.metadata_path(name), json.dumps({**meta, "hash": f"{meta['hash']:016x}"}, indent=2, sort_keys=True))
+
+    def flush(self, name=None):
+        for dataset in [name] if name else list(self._pending):
+            with self._locks[dataset]:
+                timer = self._timers.pop(dataset, None)
+                if timer:
+                    timer.cancel()
+                if not self._pending.get(dataset):
+                    continue
+                with self.write_lock(dataset):
+                    self.records(dataset)
+                    ops = self._pending.pop(dataset)
+                    try:
+                        self._write(dataset, ops)
+                    except BaseException:
+                        self._pending[dataset] = ops + self._pending.get(dataset, [])
+                        raise
+
+    def _flush_in_background(self, name):
+        try:
+            self.flush(name)
+        except Exception as exc:
+            # Changes stay queued; the next flush (logout, shutdown, export) retries and reports the failure.
+            self.last_flush_error = exc
+
+    def has_pending_writes(self, name=None) -> bool:
+        return bool(self._pending.get(name)) if name else any(self._pending.values())
+
+    def discard_pending(self):
+        """Drops every change still waiting to be written, along with the cached copies that already show them, so
+        the next read sees only what is on disk."""
+        for name in list(self._pending):
+            with self._locks[name]:
+                timer = self._timers.pop(name, None)
+                if timer:
+                    timer.cancel()
+                if self._pending.pop(name):
+                    self._cache.pop(name, None)
+                    self._metadata.pop(name, None)
+        self.last_flush_error = None
+
+    def replace(self, name, rows):
+        with self.write_lock(name):
+            timer = self._timers.pop(name, None)
+            if timer:
+                timer.cancel()
+            self._pending.pop(name, None)
+            records = index_records(name, (dict(row) for row in rows))
+            self.backend.replace(name, records.values())
+            self._cache[name] = CachedDataset(name, self.backend.signature(name), records)
+            self._metadata[name] = build_metadata(name, records.values())
+            self._metadata[name]["modified"] = dt.datetime.now().isoformat(timespec="seconds")
+            self._save_metadata(name)
+
+    def allocate_ids(self, name, count=1) -> list[str]:
+        prefix = DATA_SPECS[name]["id_prefix"]
+        with self._locks[name]:
+            records = self.records(name)
+
+            def recover():
+                return max_id_number(prefix, self.records(name).values())
+
+            first = self.backend.allocate_ids(prefix, count, recover)
+            ids = [format_id(prefix, number) for number in range(first, first + count)]
+            if any(identifier in records for identifier in ids):
+                # The sequence fell behind rows added outside the app; rescan once and allocate past them.
+                first = self.backend.allocate_ids(prefix, count, recover, resync=True)
+                ids = [format_id(prefix, number) for number in range(first, first + count)]
+            return ids
+
+    def compact_in_background(self, name):
+        with self._locks[name]:
+            if name in self._compacting:
+                return
+            self._compacting.add(name)
+        # Not a daemon: exiting waits for the swap instead of leaving the staged copy behind.
+        threading.Thread(target=self.compact, args=(name,), name=f"compact-{name}").start()
+
+    def compact(self, name):
+        """Folds a CSV journal into its base file. Entries appended while the CSV is being written are carried over.
+
+        The new base is written without holding the write lock and swapped in under it, unless another process
+        replaced the base file in the meantime.
+        """
+        try:
+            with self.write_lock(name):
+                records = self.records(name)
+                snapshot = list(records.values())
+                folded_bytes = self.backend.journal_size(name)
+                base_signature = self.backend.base_signature(name)
+            staged = self.backend.write_base(name, snapshot)
+            with self.write_lock(name):
+                if not self.backend.commit_base(name, staged, base_signature, folded_bytes):
+                    return
+                cached = self._cache.get(name)
+                if cached and cached.records is records:
+                    cached.signature = self.backend.signature(name)
+                    if name in self._metadata and not self._pending.get(name):
+                        self._save_metadata(name)
+        finally:
+            with self._locks[name]:
+                self._compacting.discard(name)
+
+    def invalidate(self, name=None):
+        for dataset in [name] if name else list(DATA_SPECS):
+            with self._locks[dataset]:
+                self._cache.pop(dataset, None)
+
+    def cache_stats(self) -> dict[str, int]:
+        totals = {"hits": 0, "misses": 0, "reloads": 0}
+        for counters in self.stats.values():
+            for counter, value in counters.items():
+                totals[counter] += value
+        return totals
+
+
+def migrate_to_sqlite(data_dir: Path = DATA_DIR, db_path: Path = SQLITE_PATH) -> dict[str, int]:
+    """Copies every CSV dataset (with any pending journal) into the SQLite database, replacing its tables.
+
+    Raises ValueError, before anything is written, if a CSV repeats a unique key: the table's unique index has no room
+    for the second row.
+    """
+    source = CsvBackend(data_dir, journal=True)
+    datasets = {name: source.load(name) for name in DATA_SPECS}
+    problems = []
+    for name, records in datasets.items():
+        # index_records keeps a repeated key's rows under (key, line); see there.
+        repeated = sorted({key[0] for key in records if isinstance(key, tuple)})
+        if repeated:
+            shown = ", ".join(repeated[:10]) + (f" and {len(repeated) - 10} more" if len(repeated) > 10 else "")
+            problems.append(f"{DATA_SPECS[name]['filename']} repeats {DATA_SPECS[name]['unique']} {shown}")
+    if problems:
+        raise ValueError("Cannot migrate: " + "; ".join(problems) + ". Remove or renumber the duplicates first.")
+    target = SqliteBackend(db_path)
+    copied = {}
+    try:
+        for name, records in datasets.items():
+            copied[name] = target.replace(name, records.values())
+    finally:
+        target.connection.close()
+    return copied
+
+
+def export_csv_backups(directory: Path) -> list[Path]:
+    STORE.flush()
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for name, spec in DATA_SPECS.items():
+        path = directory / spec["filename"]
+        write_csv_atomic(path, spec["headers"], STORE.records(name).values())
+        paths.append(path)
+    return paths
+
+
+def create_backend(mode: str = STORAGE_MODE):
+    if mode == "sqlite":
+        if not SQLITE_PATH.exists():
+            migrate_to_sqlite()
+        return SqliteBackend(SQLITE_PATH)
+    if mode in ("csv", "journal"):
+        return CsvBackend(DATA_DIR, journal=mode == "journal")
+    raise ValueError(f"Unknown storage mode {mode!r}.")
+
+
+STORE = RecordStore(create_backend())
+
+
 def load_records(name):
-    spec = DATA_SPECS[name]
-    path = DATA_DIR / spec["filename"]
-    with path.open("r", newline="", encoding="utf-8") as fh:
-        reader = csv.DictReader(fh)
-        return list(reader)
+    # Rows are shared with the store cache; callers must treat them as read-only.
+    return STORE.rows(name)
+
+
+def get_record(name, key):
+    return STORE.get(name, key)
+
+
+def search_records(name, query):
+    return STORE.search(name, query)
+
+
+def sorted_records(name, column, descending=False, query=""):
+    return STORE.sorted_rows(name, column, descending, query)
+
+
+def iter_records(name, where=None, fields=None):
+    return STORE.iter_records(name, where, fields)
+
+
+def count_records(name, where=None) -> int:
+    return STORE.count(name, where)
+
+
+def dataset_metadata(name) -> dict:
+    return STORE.metadata_copy(name)
+
+
+def first_record(name, where=None, fields=None):
+    return STORE.first(name, where, fields)
 
 
 def append_record(name, record):
-    spec = DATA_SPECS[name]
-    path = DATA_DIR / spec["filename"]
-    headers = spec["headers"]
-    unique_field = spec.get("unique")
-    if unique_field:
-        existing = load_records(name)
-        if any(row.get(unique_field) == record.get(unique_field) for row in existing):
+    unique_field = DATA_SPECS[name].get("unique")
+    # The checks run under the write lock so no other writer can add or remove the key between check and write.
+    with STORE.write_lock(name):
+        if unique_field and STORE.contains(name, record.get(unique_field)):
             raise ValueError(f"{unique_field.title()} already exists.")
-    with path.open("a", newline="", encoding="utf-8") as fh:
-        writer = csv.DictWriter(fh, fieldnames=headers)
-        writer.writerow(record)
+        STORE.append(name, record)
 
 
 def replace_records(name, rows):
-    spec = DATA_SPECS[name]
-    path = DATA_DIR / spec["filename"]
-    headers = spec["headers"]
-    with path.open("w", newline="", encoding="utf-8") as fh:
-        writer = csv.DictWriter(fh, fieldnames=headers)
-        writer.writeheader()
-        for row in rows:
-            writer.writerow(row)
-
-
-def update_record(name, key, updated_record):
-    spec = DATA_SPECS[name]
-    unique_field = spec["unique"]
-    records = load_records(name)
-    if updated_record.get(unique_field) != key:
-        for row in records:
-            if row.get(unique_field) == updated_record.get(unique_field):
-                raise ValueError(f"{unique_field.title()} already exists.")
-    replaced = False
-    for idx, row in enumerate(records):
-        if row.get(unique_field) == key:
-            records[idx] = updated_record
-            replaced = True
-            break
-    if not replaced:
-        raise ValueError(f"Record with {unique_field} {key} was not found.")
-    replace_records(name, records)
-
-
-def delete_record(name, key):
-    spec = DATA_SPECS[name]
-    unique_field = spec["unique"]
-    records = load_records(name)
-    remaining = [row for row in records if row.get(unique_field) != key]
-    if len(remaining) == len(records):
-        raise ValueError(f"Record with {unique_field} {key} was not found.")
-    replace_records(name, remaining)
+    STORE.replace(name, rows)
 
 
-def generate_id(prefix, records):
+def update_record(name, key, updated_record, expected=None):
+    # expected: the row as start_edit loaded it; the update raises ConflictError if it has changed since.
+    unique_field = DATA_SPECS[name]["unique"]
+    new_key = updated_record.get(unique_field)
+    with STORE.write_lock(name):
+        if new_key != key and STORE.contains(name, new_key):
+            raise ValueError(f"{unique_field.title()} already exists.")
+        if not STORE.contains(name, key):
+            if expected is not None:
+                raise ConflictError(f"{key} was deleted by someone else after you opened it.")
+            raise ValueError(f"Record with {unique_field} {key} was not found.")
+        STORE.update(name, key, updated_record, expected)
+
+
+def delete_record(name, key, expected=None):
+    # expected: the row as the user last saw it; the delete raises ConflictError if it has changed since.
+    unique_field = DATA_SPECS[name]["unique"]
+    with STORE.write_lock(name):
+        if not STORE.contains(name, key):
+            if expected is not None:
+                raise ConflictError(f"{key} was already deleted by someone else.")
+            raise ValueError(f"Record with {unique_field} {key} was not found.")
+        STORE.delete(name, key, expected)
+
+
+def class_occupancy() -> OccupancyIndex:
+    return STORE.dataset("classes").indexes["occupancy"]
+
+
+def subject_index() -> SubjectIndex:
+    return STORE.dataset("tutors").indexes["subjects"]
+
+
+def tutors_teaching(subject, schedule="", student_id=None, duration="", start_date="", end_date="") -> list[str]:
+    """Ids of the tutors teaching ``subject``. With ``schedule``, only those free for that session (and only if
+    ``student_id`` is free too), e.g. tutors_teaching("Physics", "Tue 14:00")."""
+    tutor_ids = sorted(subject_index().teaching(subject))
+    if not schedule:
+        return tutor_ids
+    # Tutors whose occupancy cells are clear are free outright; the rest are settled by the exact interval check.
+    free = set(class_occupancy().free_at(schedule, tutor_ids, student_id, duration)) if not check_session(schedule, duration) else set()
+    return [
+        tutor_id for tutor_id in tutor_ids
+        if tutor_id in free or not find_schedule_conflict(schedule, tutor_id, student_id, start_date=start_date, end_date=end_date, duration=duration)
+    ]
+
+
+def other_cells(field, participant, day: int, exclude_key) -> int:
+    """Occupancy cells on weekday ``day`` held by ``participant``'s classes other than ``exclude_key``."""
+    cells = 0
+    for lesson in STORE.dataset("classes").indexes["intervals"].overlapping(field, participant, day, DAY_START, DAY_END):
+        if lesson["id"] != exclude_key:
+            cells |= session_cells(lesson.schedule, lesson.duration)
+    return cells
+
+
+def term_cells(field, participant, start_date="", end_date="", exclude_key=None) -> int:
+    """Occupancy cells held by ``participant``'s classes, other than ``exclude_key``, whose term overlaps
+    start_date..end_date."""
+    first, last = date_span(start_date, end_date)
+    intervals = STORE.dataset("classes").indexes["intervals"]
+    cells = 0
+    for day in range(len(DAYS)):
+        for lesson in intervals.overlapping(field, participant, day, DAY_START, DAY_END):
+            lesson_first, lesson_last = lesson.active_range()
+            if lesson["id"] != exclude_key and lesson_first <= last and first <= lesson_last:
+                cells |= session_cells(lesson.schedule, lesson.duration)
+    return cells
+
+
+def find_schedule_conflict(schedule, tutor_id, student_id, exclude_key=None, start_date="", end_date="", duration="") -> dict[str, str] | None:
+    """A class that has the tutor or student in an overlapping session during the start_date..end_date term, if any."""
+    # The bitmask answers the common "cells are free" case for sessions inside opening hours; anything else asks the
+    # interval lists for the exact minute overlap.
+    if not check_session(schedule, duration) and class_occupancy().is_free(schedule, tutor_id, student_id, duration):
+        return None
+    return STORE.dataset("classes").indexes["intervals"].conflict(schedule, duration, tutor_id, student_id, start_date, end_date, exclude_key)
+
+
+def class_occurrences(start: dt.date, end: dt.date) -> list[tuple[dt.datetime, ClassRecord]]:
+    """(start time, class) for every class meeting from ``start`` to ``end`` inclusive, in time order. Collected under
+    the classes lock, as the reminders, snapshot and PDFs read it on the loader thread while the UI edits classes."""
+    return STORE.read_locked("classes", lambda cached: list(cached.indexes["occurrences"].between(start, end)))
+
+
+def session_times(start: dt.datetime, lesson) -> str:
+    """"10:30-12:00" for a meeting of ``lesson`` starting at ``start``."""
+    end = start + dt.timedelta(minutes=duration_minutes(lesson["duration"]))
+    return f"{start:%H:%M}-{end:%H:%M}"
+
+
+def max_id_number(prefix, records) -> int:
     max_value = 0
     for row in records:
         identifier = row.get("id", "")
@@ -256,22 +2412,377 @@ def generate_id(prefix, records):
                 max_value = max(max_value, int(identifier.split("-", 1)[1]))
             except ValueError:
                 continue
-    return f"{prefix}-{max_value + 1:03d}"
+    return max_value
+
+
+def format_id(prefix, number) -> str:
+    # Three digits is only the minimum width; numbers past 999 simply grow (S-1000).
+    return f"{prefix}-{number:03d}"
+
+
+def generate_id(prefix, records):
+    return format_id(prefix, max_id_number(prefix, records) + 1)
+
+
+def next_id(name) -> str:
+    return STORE.allocate_ids(name)[0]
 
 
 def schedule_sort_key(schedule: str) -> tuple[int, int, int]:
-    day, _, time = schedule.partition(" ")
-    try:
-        day_index = DAYS.index(day)
-    except ValueError:
-        day_index = len(DAYS)
-    hour, minute = 0, 0
-    if ":" in time:
+    day_index, minutes = schedule_slot(schedule)
+    return (day_index, minutes // 60, minutes % 60)
+
+
+# ---------- Bulk import ----------
+IMPORTABLE_DATASETS = ("tutors", "students", "classes")
+
+
+class ImportReport:
+    def __init__(self, name):
+        self.name = name
+        self.imported = 0
+        self.errors: list[tuple[int, str]] = []
+        self.elapsed = 0.0
+
+    def summary(self) -> str:
+        rate = self.imported / self.elapsed if self.elapsed else 0
+        return f"Imported {self.imported} {self.name} ({rate:,.0f} rows/s); {len(self.errors)} row(s) rejected."
+
+
+def iter_import_rows(path: Path):
+    """Streams (line number, row) pairs from a CSV file or, for .jsonl/.ndjson, one JSON object per line."""
+    with path.open("r", newline="", encoding="utf-8-sig") as fh:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            for line_no, line in enumerate(fh, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as exc:
+                    yield line_no, exc
+                    continue
+                yield line_no, row if isinstance(row, dict) else ValueError("Expected a JSON object.")
+        else:
+            reader = csv.DictReader(fh)
+            for row in reader:
+                yield reader.line_num, row
+
+
+class BulkImporter:
+    """Checks rows with the same rules as the add forms, then commits the valid ones in one write."""
+    def __init__(self, name):
+        if name not in IMPORTABLE_DATASETS:
+            raise ValueError(f"Cannot import {name}; choose one of {', '.join(IMPORTABLE_DATASETS)}.")
+        self.name = name
+        self.headers = DATA_SPECS[name]["headers"]
+        self.unique_field = DATA_SPECS[name]["unique"]
+        self.batch_keys: set[str] = set()
+        # Classes accepted earlier in the same file, checked for overlaps like the stored ones.
+        self.batch_sessions = IntervalIndex()
+
+    def clean(self, row) -> dict[str, str]:
+        record = {header: str(row.get(header) or "").strip() for header in self.headers}
+        if self.name == "tutors":
+            record["subjects"] = clean_subjects(record["subjects"])
+        return record
+
+    def check(self, record: dict[str, str]) -> str:
+        key = record.get(self.unique_field)
+        if key and (key in self.batch_keys or STORE.contains(self.name, key)):
+            return f"{self.unique_field.title()} {key} already exists."
+        if self.name == "tutors":
+            if not record["name"] or not record["email"]:
+                return "Name and email are required."
+        elif self.name == "students":
+            if not record["name"] or not record["email"] or not record["year"]:
+                return "All fields are required."
+        elif self.name == "classes":
+            return self.check_class(record)
+        if not is_valid_email(record["email"]):
+            return "Please enter a valid email address."
+        return ""
+
+    def check_class(self, record: dict[str, str]) -> str:
+        if not all(record[field] for field in ("title", "tutor_id", "student_id", "schedule")):
+            return "Please complete all fields."
+        error = check_session(record["schedule"], record["duration"]) or clean_recurrence(record)
+        if error:
+            return error
+        if not STORE.contains("tutors", record["tutor_id"]):
+            return f"Tutor {record['tutor_id']} does not exist."
+        if not STORE.contains("students", record["student_id"]):
+            return f"Student {record['student_id']} does not exist."
+        if record["duration"]:
+            record["duration"] = str(int(record["duration"]))
+        term = {"start_date": record["start_date"], "end_date": record["end_date"]}
+        if self.batch_sessions.conflict(record["schedule"], record["duration"], record["tutor_id"], record["student_id"], **term) or find_schedule_conflict(
+            record["schedule"], record["tutor_id"], record["student_id"], duration=record["duration"], **term
+        ):
+            return "The selected tutor or student already has a class at this time."
+        self.batch_sessions.add(len(self.batch_sessions.entries), ClassRecord(record))
+        return ""
+
+    def run(self, rows, dry_run: bool = False) -> ImportReport:
+        report = ImportReport(self.name)
+        started = time.perf_counter()
+        accepted = []
+        for line_no, row in rows:
+            if isinstance(row, Exception):
+                report.errors.append((line_no, f"Unreadable row: {row}"))
+                continue
+            record = self.clean(row)
+            error = self.check(record)
+            if error:
+                report.errors.append((line_no, error))
+                continue
+            if record.get(self.unique_field):
+                self.batch_keys.add(record[self.unique_field])
+            accepted.append(record)
+        missing_ids = [record for record in accepted if not record.get(self.unique_field)]
+        if missing_ids and not dry_run:
+            for record, identifier in zip(missing_ids, STORE.allocate_ids(self.name, len(missing_ids))):
+                record[self.unique_field] = identifier
+        if accepted and not dry_run:
+            STORE.append_many(self.name, accepted)
+        report.imported = len(accepted)
+        report.elapsed = time.perf_counter() - started
+        return report
+
+
+def import_file(name, path: Path, dry_run: bool = False) -> ImportReport:
+    return BulkImporter(name).run(iter_import_rows(path), dry_run=dry_run)
+
+
+# ---------- Scheduling ----------
+class ScheduleReport:
+    def __init__(self):
+        self.assigned: list[dict[str, str]] = []
+        self.errors: list[tuple[int, str]] = []
+        self.elapsed = 0.0
+
+    def summary(self) -> str:
+        return f"Scheduled {len(self.assigned)} lesson(s) in {self.elapsed:.2f}s; {len(self.errors)} request(s) not fully scheduled."
+
+
+class Scheduler:
+    """Assigns tutors and weekly slots to lesson requests: student_id, subject, sessions (per week), days (preferred)
+    and duration (minutes, blank = DEFAULT_DURATION). Sessions start on the TIME_SLOTS grid.
+
+    Works on copies of the tutor and student occupancy masks, so a batch sees its own bookings. Each session goes to
+    the least-loaded tutor teaching the subject who shares a free slot with the student, on a day the request has not
+    used yet where possible. Requests for the scarcest subjects are placed first.
+    """
+    def __init__(self):
+        occupancy = class_occupancy()
+        self.tutor_busy = dict(occupancy.masks["tutor_id"])
+        self.student_busy = dict(occupancy.masks["student_id"])
+        self.load = dict(dataset_metadata("classes").get("tutor_load", {}))
+        self.subjects = subject_index()
+        # Cells booked by this batch per (field, participant), and the class release() set aside.
+        self.booked: dict[tuple[str, str], int] = {}
+        self.released_key: str | None = None
+
+    def candidates(self, subject) -> set[str]:
+        return self.subjects.teaching(subject)
+
+    def suggest(self, student_id, subject="", tutor_id="", days=(), used_days=0, duration="", start_date="", end_date="") -> tuple[str, str] | None:
+        """Returns (tutor id, schedule) for one session, or None. ``tutor_id`` fixes the tutor; otherwise one is
+        picked from those teaching ``subject``. Slots on ``days`` only (all days when empty), avoiding ``used_days``.
+        Classes whose term does not overlap start_date..end_date are no obstacle."""
+        allowed = sum(DAY_MASKS[day] for day in days) if days else FULL_WEEK
+        length = -(-duration_minutes(duration) // SLOT_MINUTES)
+        student = self.student_busy.get(student_id, 0)
+        term_student = None
+        tutors = [tutor_id] if tutor_id else sorted(self.candidates(subject), key=lambda tutor: (self.load.get(tutor, 0), tutor))
+        for tutor in tutors:
+            free = allowed & free_starts(FULL_WEEK & ~(student | self.tutor_busy.get(tutor, 0)), length)
+            if not free and (start_date or end_date):
+                # The masks hold every class whatever its term; only the classes overlapping this term can clash.
+                if term_student is None:
+                    term_student = self.term_busy("student_id", student_id, start_date, end_date)
+                free = allowed & free_starts(FULL_WEEK & ~(term_student | self.term_busy("tutor_id", tutor, start_date, end_date)), length)
+            if free:
+                free = free & ~used_days or free
+                return tutor, SLOT_SCHEDULES[(free & -free).bit_length() - 1]
+        return None
+
+    def term_busy(self, field, participant, start_date, end_date) -> int:
+        return term_cells(field, participant, start_date, end_date, self.released_key) | self.booked.get((field, participant), 0)
+
+    def book(self, tutor_id, student_id, schedule, duration=""):
+        cells = session_cells(schedule, duration)
+        self.tutor_busy[tutor_id] = self.tutor_busy.get(tutor_id, 0) | cells
+        self.student_busy[student_id] = self.student_busy.get(student_id, 0) | cells
+        for participant in (("tutor_id", tutor_id), ("student_id", student_id)):
+            self.booked[participant] = self.booked.get(participant, 0) | cells
+        self.load[tutor_id] = self.load.get(tutor_id, 0) + 1
+
+    def release(self, lesson):
+        # Frees a class's own cells while that class is being edited, except cells another of the tutor's or
+        # student's classes also touches.
+        self.released_key = lesson.get("id")
+        cells = session_cells(lesson["schedule"], lesson.get("duration", ""))
+        if not cells:
+            return
+        day = schedule_slot(lesson["schedule"])[0]
+        for field, busy in (("tutor_id", self.tutor_busy), ("student_id", self.student_busy)):
+            participant = lesson[field]
+            kept = other_cells(field, participant, day, lesson.get("id"))
+            busy[participant] = busy.get(participant, 0) & ~(cells & ~kept)
+        self.load[lesson["tutor_id"]] = max(self.load.get(lesson["tutor_id"], 0) - 1, 0)
+
+    def parse(self, row) -> tuple[dict | None, str]:
+        student_id = str(row.get("student_id") or "").strip()
+        subject = str(row.get("subject") or "").strip()
+        if not student_id or not subject:
+            return None, "student_id and subject are required."
+        if not STORE.contains("students", student_id):
+            return None, f"Student {student_id} does not exist."
+        if not self.candidates(subject):
+            return None, f"No tutor teaches {subject}."
         try:
-            hour, minute = map(int, time.split(":", 1))
-        except ValueError:
-            pass
-    return (day_index, hour, minute)
+            sessions = int(row.get("sessions") or 1)
+        except (TypeError, ValueError):
+            return None, "sessions must be a whole number."
+        if sessions < 1:
+            return None, "sessions must be at least 1."
+        days = split_values(row.get("days"))
+        unknown = [day for day in days if day not in DAYS]
+        if unknown:
+            return None, f"Unknown day(s): {', '.join(unknown)}."
+        duration = str(row.get("duration") or "").strip()
+        if duration and (not duration.isdigit() or not 0 < int(duration) <= DAY_END - DAY_START):
+            return None, f"duration must be a whole number of minutes up to {DAY_END - DAY_START}."
+        recurrence = {field: row.get(field) for field in RECURRENCE_FIELDS}
+        error = clean_recurrence(recurrence)
+        if error:
+            return None, error
+        duration = str(int(duration)) if duration else ""
+        return {"student_id": student_id, "subject": subject, "sessions": sessions, "days": days, "duration": duration, "recurrence": recurrence}, ""
+
+    def plan(self, requests) -> ScheduleReport:
+        report = ScheduleReport()
+        started = time.perf_counter()
+        parsed = []
+        for line_no, row in requests:
+            if isinstance(row, Exception):
+                report.errors.append((line_no, f"Unreadable row: {row}"))
+                continue
+            request, error = self.parse(row)
+            if error:
+                report.errors.append((line_no, error))
+            else:
+                parsed.append((line_no, request))
+        parsed.sort(key=lambda item: (len(self.candidates(item[1]["subject"])), -item[1]["sessions"], item[0]))
+        for line_no, request in parsed:
+            used_days = 0
+            for session in range(request["sessions"]):
+                recurrence = request["recurrence"]
+                choice = self.suggest(
+                    request["student_id"], request["subject"], days=request["days"], used_days=used_days, duration=request["duration"],
+                    start_date=recurrence["start_date"], end_date=recurrence["end_date"],
+                )
+                if choice is None:
+                    report.errors.append((line_no, f"No {request['subject']} tutor has a free slot with {request['student_id']} ({session} of {request['sessions']} session(s) scheduled)."))
+                    break
+                tutor_id, schedule = choice
+                self.book(tutor_id, request["student_id"], schedule, request["duration"])
+                used_days |= DAY_MASKS[schedule.partition(" ")[0]]
+                report.assigned.append(
+                    {"id": "", "title": request["subject"], "tutor_id": tutor_id, "student_id": request["student_id"], "schedule": schedule, "duration": request["duration"], **request["recurrence"]}
+                )
+        report.errors.sort()
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    def run(self, requests, dry_run: bool = False) -> ScheduleReport:
+        """Plans every request, then adds all assigned classes in one write (nothing is written with ``dry_run``)."""
+        report = self.plan(requests)
+        if report.assigned and not dry_run:
+            started = time.perf_counter()
+            for record, identifier in zip(report.assigned, STORE.allocate_ids("classes", len(report.assigned))):
+                record["id"] = identifier
+            STORE.append_many("classes", report.assigned)
+            report.elapsed += time.perf_counter() - started
+        return report
+
+
+def schedule_file(path: Path, dry_run: bool = False) -> ScheduleReport:
+    return Scheduler().run(iter_import_rows(path), dry_run=dry_run)
+
+
+# ---------- Background loading ----------
+class BackgroundLoader:
+    """Runs disk work on a thread pool and hands the results back on the Tk loop, which polls for them with after().
+
+    Work is submitted on a named channel; submitting again on the channel, or cancelling it, makes any earlier
+    request stale, so its result is dropped instead of reaching a view that has moved on.
+    """
+
+    def __init__(self, widget):
+        self.widget = widget
+        self.executor = ThreadPoolExecutor(max_workers=LOADER_WORKERS, thread_name_prefix="tutorren-loader")
+        self.tickets = itertools.count(1)
+        self.latest: dict[str, int] = {}
+        self.pending: list[tuple] = []
+        self.polling = None
+
+    def submit(self, channel: str, work, on_done, on_error=None):
+        """Runs ``work()`` off the UI thread, then ``on_done(result)`` (or ``on_error(exc)``) on it."""
+        self.cancel(channel)
+        ticket = self.latest[channel] = next(self.tickets)
+        self.pending.append((channel, ticket, self.executor.submit(work), on_done, on_error or self.report_error))
+        if self.polling is None:
+            self.polling = self.widget.after(LOADER_POLL_MS, self.poll)
+
+    def busy(self, channel: str) -> bool:
+        return channel in self.latest
+
+    def cancel(self, channel: str):
+        # Work that has not started is dropped from the pool; work already running finishes and is ignored.
+        if self.latest.pop(channel, None) is None:
+            return
+        for queued_channel, _ticket, future, _done, _error in self.pending:
+            if queued_channel == channel:
+                future.cancel()
+
+    def cancel_all(self):
+        for channel in list(self.latest):
+            self.cancel(channel)
+
+    def poll(self):
+        self.polling = None
+        waiting = []
+        finished = []
+        for entry in self.pending:
+            (finished if entry[2].done() else waiting).append(entry)
+        # Swapped out before the callbacks run, so they may submit follow-up work.
+        self.pending = waiting
+        for channel, ticket, future, on_done, on_error in finished:
+            if future.cancelled() or self.latest.get(channel) != ticket:
+                continue
+            del self.latest[channel]
+            error = future.exception()
+            if error is not None:
+                on_error(error)
+            else:
+                on_done(future.result())
+        if self.pending and self.polling is None:
+            self.polling = self.widget.after(LOADER_POLL_MS, self.poll)
+
+    def report_error(self, error: BaseException):
+        messagebox.showerror("Could not load data", str(error))
+
+    def shutdown(self):
+        self.cancel_all()
+        if self.polling is not None:
+            self.widget.after_cancel(self.polling)
+            self.polling = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def loader_for(widget) -> BackgroundLoader:
+    return widget.winfo_toplevel().loader
 
 
 # ---------- UI ----------
@@ -307,8 +2818,8 @@ class LoginFrame(ttk.Frame):
         password_entry = ttk.Entry(card, textvariable=self.password_var, show="*")
         password_entry.grid(row=5, column=0, sticky=tk.EW, pady=(6, 24))
 
-        login_btn = ttk.Button(card, text="Sign in", style="Accent.TButton", command=self.attempt_login)
-        login_btn.grid(row=6, column=0, sticky=tk.EW)
+        self.login_button = ttk.Button(card, text="Sign in", style="Accent.TButton", command=self.attempt_login)
+        self.login_button.grid(row=6, column=0, sticky=tk.EW)
 
         ttk.Label(card, text="Managers can create accounts once inside the app.", style="Card.TLabel").grid(row=7, column=0, sticky=tk.W, pady=(20, 0))
 
@@ -326,13 +2837,23 @@ class LoginFrame(ttk.Frame):
         if not username or not password:
             messagebox.showwarning("Missing information", "Please enter both username and password.")
             return
-        users = load_records("users")
-        for user in users:
-            if user["username"] == username and user["password"] == password:
-                self.on_success(user)
-                return
+        loader = loader_for(self)
+        if loader.busy("login"):
+            return
+        self.login_button.configure(state="disabled", text="Signing in…")
+        loader.submit("login", lambda: first_record("users", where={"username": username, "password": password}), self.finish_login, self.login_error)
+
+    def finish_login(self, user):
+        if user:
+            self.on_success(user)
+            return
+        self.login_button.configure(state="normal", text="Sign in")
         messagebox.showerror("Login failed", "Invalid username or password.")
 
+    def login_error(self, error: BaseException):
+        self.login_button.configure(state="normal", text="Sign in")
+        messagebox.showerror("Login failed", f"Could not read the user list:\n{error}")
+
 
 class Dashboard(ttk.Frame):
     def __init__(self, master, current_user):
@@ -358,6 +2879,13 @@ class Dashboard(ttk.Frame):
         navigation_menu.add_command(label="Classes", command=lambda: self.show_view("classes"))
         self.menu_bar.add_cascade(label="Navigate", menu=navigation_menu)
 
+        data_menu = tk.Menu(self.menu_bar, tearoff=0)
+        for dataset in IMPORTABLE_DATASETS:
+            data_menu.add_command(label=f"Import {dataset.title()}…", command=lambda name=dataset: self.import_dataset(name))
+        data_menu.add_separator()
+        data_menu.add_command(label="Export CSV Backups", command=self.export_backups)
+        self.menu_bar.add_cascade(label="Data", menu=data_menu)
+
         account_menu = tk.Menu(self.menu_bar, tearoff=0)
         account_menu.add_command(label="Logout", command=self.logout)
         self.menu_bar.add_cascade(label="Account", menu=account_menu)
@@ -370,26 +2898,59 @@ class Dashboard(ttk.Frame):
         self.content = ttk.Frame(self, style="Background.TFrame")
         self.content.pack(fill=tk.BOTH, expand=True)
 
-        self.views = {
-            "dashboard": DashboardView(self.content, self.current_user),
-            "tutors": TutorsView(self.content, self.current_user),
-            "students": StudentsView(self.content, self.current_user),
-            "classes": ClassesView(self.content, self.current_user),
-        }
+        self.view_types = {"dashboard": DashboardView, "tutors": TutorsView, "students": StudentsView, "classes": ClassesView}
         if self.current_user.get("role") == "Manager":
-            self.views["users"] = UsersView(self.content, self.current_user)
+            self.view_types["users"] = UsersView
+        # Built on first visit, so signing in only builds the dashboard.
+        self.views: dict[str, ttk.Frame] = {}
         self.show_view("dashboard")
 
     def show_view(self, name):
+        loader = loader_for(self)
         for view_name, frame in self.views.items():
-            if view_name == name:
-                frame.tkraise()
-                frame.refresh()
-            else:
+            if view_name != name:
                 frame.lower()
+                # Each view loads on the channel named after it; a load for a view switched away from is dropped.
+                loader.cancel(view_name)
+        frame = self.views.get(name)
+        if frame is None:
+            frame = self.views[name] = self.view_types[name](self.content, self.current_user)
+        frame.tkraise()
+        # Views skip the work themselves when nothing they show has changed since they last rendered.
+        frame.refresh()
+
+    def import_dataset(self, name):
+        path = filedialog.askopenfilename(
+            parent=self,
+            title=f"Import {name.title()}",
+            filetypes=[("CSV or JSON lines", "*.csv *.jsonl *.ndjson"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+        try:
+            report = import_file(name, Path(path))
+        except (OSError, ValueError, csv.Error) as exc:
+            messagebox.showerror("Import failed", str(exc))
+            return
+        details = "\n".join(f"Line {line_no}: {error}" for line_no, error in report.errors[:15])
+        if len(report.errors) > 15:
+            details += f"\n…and {len(report.errors) - 15} more."
+        messagebox.showinfo("Import finished", f"{report.summary()}\n\n{details}".strip())
+        self.show_view(name)
+
+    def export_backups(self):
+        try:
+            paths = export_csv_backups(backup_directory())
+        except OSError as exc:
+            messagebox.showerror("Export failed", str(exc))
+            return
+        messagebox.showinfo("Backups exported", f"CSV backups written to {paths[0].parent}")
 
     def logout(self):
+        if not self.master.flush_pending_writes():
+            return
         self.master.config(menu=None)
+        loader_for(self).cancel_all()
         self.destroy()
         self.master.show_login()
 
@@ -421,72 +2982,142 @@ class DashboardView(ttk.Frame):
         self.stats.column("type", width=240)
         self.stats.column("count", width=80, anchor=tk.CENTER)
         self.stats.pack(fill=tk.X)
-        self.refresh()
+        self.status = ttk.Label(stats_card, text="", style="Card.TLabel")
+        self.status.pack(anchor=tk.W, pady=(12, 0))
+        self.running: set[str] = set()
+        self.rendered: tuple | None = None
 
     def refresh(self):
-        for row in self.stats.get_children():
-            self.stats.delete(row)
+        # The stats come from the metadata, which follows each dataset's stored version, or its generation while
+        # edits are still waiting to be written. Neither needs the rows parsed, nor moves when collect_stats loads them.
+        stamp = (dt.date.today(),) + tuple(
+            (STORE.version(name), STORE.generation(name) if STORE.has_pending_writes(name) else None) for name in DATA_SPECS
+        )
+        if stamp == self.rendered:
+            return
+        self.status.configure(text="Loading…")
+        loader_for(self).submit("dashboard", self.collect_stats, lambda rows: self.show_stats(rows, stamp))
+
+    def collect_stats(self) -> list[tuple[str, int]]:
+        # Runs on the loader thread.
+        rows = []
         for dataset in ("users", "tutors", "students", "classes"):
             if dataset == "users" and self.current_user.get("role") != "Manager":
                 continue
-            records = load_records(dataset)
-            self.stats.insert("", tk.END, values=(dataset.title(), len(records)))
+            rows.append((dataset.title(), dataset_metadata(dataset)["rows"]))
+        classes = dataset_metadata("classes")
+        today = dt.date.today().strftime("%a")
+        rows.append(("Classes Today", classes["by_day"].get(today, 0)))
+        # Tutors minus the distinct tutor ids that classes point at. Ids of deleted or unknown tutors are not subtracted;
+        # they are checked in one key lookup, so the tutors are still never loaded whole for this.
+        booked_tutors = STORE.count_present("tutors", classes["tutor_load"])
+        idle_tutors = dataset_metadata("tutors")["rows"] - booked_tutors
+        rows.append(("Tutors Without Classes", idle_tutors))
+        return rows
+
+    def show_stats(self, rows, stamp):
+        self.stats.delete(*self.stats.get_children())
+        for row in rows:
+            self.stats.insert("", tk.END, values=row)
+        self.status.configure(text="")
+        self.rendered = stamp
+
+    def run_action(self, channel: str, label: str, work, on_done):
+        """Runs a quick action on the loader thread, one at a time per action, with its progress shown under the stats."""
+        if channel in self.running:
+            return
+        self.running.add(channel)
+        self.status.configure(text=label)
+
+        def finished(result):
+            self.running.discard(channel)
+            self.status.configure(text="")
+            on_done(result)
+
+        def failed(error):
+            self.running.discard(channel)
+            self.status.configure(text="")
+            messagebox.showerror("Action failed", str(error))
+
+        loader_for(self).submit(channel, work, finished, failed)
 
     def send_tutor_reminders(self):
-        EMAIL_SERVICE.send_daily_tutor_reminders()
-        messagebox.showinfo("Reminders queued", f"Tutor reminder emails have been written to {EMAIL_LOG}.")
+        self.run_action(
+            "reminders",
+            "Writing tutor reminders…",
+            EMAIL_SERVICE.send_daily_tutor_reminders,
+            lambda _result: messagebox.showinfo("Reminders queued", f"Tutor reminder emails have been written to {EMAIL_LOG}."),
+        )
 
     def show_three_day_schedule(self):
-        today = dt.date.today()
-        classes = load_records("classes")
-        tutors = {row["id"]: row for row in load_records("tutors")}
-        students = {row["id"]: row for row in load_records("students")}
-
-        lines: list[str] = []
-        for offset in range(3):
-            target_date = today + dt.timedelta(days=offset)
-            label = target_date.strftime("%A (%b %d)")
-            day_code = target_date.strftime("%a")
-            lines.append(label + ":")
-            day_classes = [lesson for lesson in classes if lesson.get("schedule", " ").split(" ")[0] == day_code]
-            if not day_classes:
-                lines.append("  • No sessions scheduled")
-                lines.append("")
-                continue
+        self.run_action(
+            "snapshot",
+            "Collecting upcoming sessions…",
+            three_day_schedule,
+            lambda message: messagebox.showinfo("Upcoming Sessions", message or "No sessions scheduled in the next three days."),
+        )
 
-            for lesson in sorted(day_classes, key=lambda item: schedule_sort_key(item.get("schedule", ""))):
-                time = lesson.get("schedule", "").split(" ")[1] if " " in lesson.get("schedule", "") else ""
-                tutor_name = tutors.get(lesson["tutor_id"], {}).get("name", lesson["tutor_id"])
-                student_name = students.get(lesson["student_id"], {}).get("name", lesson["student_id"])
-                title = lesson.get("title", "Lesson")
-                lines.append(f"  • {time} — {title} (Tutor: {tutor_name}, Student: {student_name})")
-            lines.append("")
+    def generate_schedule_pdfs(self):
+        self.run_action(
+            "pdfs",
+            "Writing schedule PDFs…",
+            write_schedule_pdfs,
+            lambda paths: messagebox.showinfo("Schedules exported", f"Tutor schedule: {paths[0]}\nStudent schedule: {paths[1]}"),
+        )
 
-        message = "\n".join(lines).strip()
-        messagebox.showinfo("Upcoming Sessions", message or "No sessions scheduled in the next three days.")
 
-    def generate_schedule_pdfs(self):
-        classes = load_records("classes")
-        tutors = {row["id"]: row for row in load_records("tutors")}
-        students = {row["id"]: row for row in load_records("students")}
-        tutor_sections: dict[str, list[str]] = {}
-        student_sections: dict[str, list[str]] = {}
-        for lesson in sorted(classes, key=lambda item: schedule_sort_key(item.get("schedule", ""))):
-            tutor = tutors.get(lesson["tutor_id"], {})
-            student = students.get(lesson["student_id"], {})
-            entry = f"{lesson['schedule']} — {lesson['title']} with {student.get('name', 'Unknown')}"
-            tutor_label = f"Tutor: {tutor.get('name', lesson['tutor_id'])} ({lesson['tutor_id']})"
-            tutor_sections.setdefault(tutor_label, []).append(entry)
-
-            student_entry = f"{lesson['schedule']} — {lesson['title']} with {tutor.get('name', 'Unknown Tutor')}"
-            student_label = f"Student: {student.get('name', lesson['student_id'])} ({lesson['student_id']})"
-            student_sections.setdefault(student_label, []).append(student_entry)
-
-        tutor_path = EXPORT_DIR / "tutor_schedule.pdf"
-        student_path = EXPORT_DIR / "student_schedule.pdf"
-        create_schedule_pdf(tutor_path, tutor_sections or {"Tutors": []})
-        create_schedule_pdf(student_path, student_sections or {"Students": []})
-        messagebox.showinfo("Schedules exported", f"Tutor schedule: {tutor_path}\nStudent schedule: {student_path}")
+def three_day_schedule() -> str:
+    today = dt.date.today()
+    by_date: dict[dt.date, list[tuple[dt.datetime, dict[str, str]]]] = defaultdict(list)
+    for start, lesson in class_occurrences(today, today + dt.timedelta(days=2)):
+        by_date[start.date()].append((start, lesson))
+    lines: list[str] = []
+    for offset in range(3):
+        target_date = today + dt.timedelta(days=offset)
+        label = target_date.strftime("%A (%b %d)")
+        lines.append(label + ":")
+        day_classes = by_date.get(target_date, [])
+        if not day_classes:
+            lines.append("  • No sessions scheduled")
+            lines.append("")
+            continue
+
+        for start, lesson in day_classes:
+            time = session_times(start, lesson)
+            tutor_name = (get_record("tutors", lesson["tutor_id"]) or {}).get("name", lesson["tutor_id"])
+            student_name = (get_record("students", lesson["student_id"]) or {}).get("name", lesson["student_id"])
+            title = lesson.get("title", "Lesson")
+            lines.append(f"  • {time} — {title} (Tutor: {tutor_name}, Student: {student_name})")
+        lines.append("")
+
+    return "\n".join(lines).strip()
+
+
+def write_schedule_pdfs() -> tuple[Path, Path]:
+    STORE.flush()
+    today = dt.date.today()
+    tutors = {row["id"]: row for row in load_records("tutors")}
+    students = {row["id"]: row for row in load_records("students")}
+    tutor_sections: dict[str, list[str]] = {}
+    student_sections: dict[str, list[str]] = {}
+    # The coming seven days as dated sessions, so term dates, skipped dates and fortnightly classes show as they fall.
+    for start, lesson in class_occurrences(today, today + dt.timedelta(days=6)):
+        tutor = tutors.get(lesson["tutor_id"], {})
+        student = students.get(lesson["student_id"], {})
+        when = f"{start:%a %d %b} {session_times(start, lesson)}"
+        entry = f"{when} — {lesson['title']} with {student.get('name', 'Unknown')}"
+        tutor_label = f"Tutor: {tutor.get('name', lesson['tutor_id'])} ({lesson['tutor_id']})"
+        tutor_sections.setdefault(tutor_label, []).append(entry)
+
+        student_entry = f"{when} — {lesson['title']} with {tutor.get('name', 'Unknown Tutor')}"
+        student_label = f"Student: {student.get('name', lesson['student_id'])} ({lesson['student_id']})"
+        student_sections.setdefault(student_label, []).append(student_entry)
+
+    tutor_path = EXPORT_DIR / "tutor_schedule.pdf"
+    student_path = EXPORT_DIR / "student_schedule.pdf"
+    create_schedule_pdf(tutor_path, tutor_sections or {"Tutors": []})
+    create_schedule_pdf(student_path, student_sections or {"Students": []})
+    return tutor_path, student_path
 
 
 class DataListView(ttk.Frame):
@@ -494,12 +3125,16 @@ class DataListView(ttk.Frame):
     dataset: str = ""
     add_fields: tuple[tuple[str, str], ...] = ()
     singular: str = ""
+    # Column the list is sorted on until a heading is clicked; None keeps file order.
+    default_sort: str | None = None
 
     def __init__(self, master, current_user):
         super().__init__(master, padding=24, style="Background.TFrame")
         self.current_user = current_user
         self.unique_field = DATA_SPECS[self.dataset]["unique"]
         self.editing_key: str | None = None
+        self.editing_record: dict[str, str] | None = None
+        self.editing_version = None
         self.grid(row=0, column=0, sticky="nsew")
         master.columnconfigure(0, weight=1)
         master.rowconfigure(0, weight=1)
@@ -520,6 +3155,16 @@ class DataListView(ttk.Frame):
 
         title = ttk.Label(content, text=self.dataset.title(), style="SectionTitle.TLabel")
         title.pack(anchor=tk.W)
+        self.loading_label = ttk.Label(content, text="", style="Muted.TLabel")
+        self.loading_label.pack(anchor=tk.W)
+
+        search_bar = ttk.Frame(content, style="Background.TFrame")
+        search_bar.pack(fill=tk.X, pady=(12, 0))
+        ttk.Label(search_bar, text="Search", style="Muted.TLabel").pack(side=tk.LEFT)
+        self.query = ""
+        self.search_var = tk.StringVar()
+        ttk.Entry(search_bar, textvariable=self.search_var, width=40).pack(side=tk.LEFT, padx=(10, 0))
+        self.search_var.trace_add("write", lambda *_: self.search_changed())
 
         list_card = ttk.Frame(content, style="Card.TFrame", padding=20)
         list_card.pack(fill=tk.BOTH, expand=True, pady=(18, 16))
@@ -528,16 +3173,36 @@ class DataListView(ttk.Frame):
         list_card.rowconfigure(0, weight=1)
 
         self.tree = ttk.Treeview(list_card, columns=self.columns, show="headings", style="Data.Treeview")
-        for col, label in zip(self.columns, self.columns):
-            self.tree.heading(col, text=label.replace("_", " ").title())
+        self.sort_column = self.default_sort
+        self.sort_descending = False
+        # Set when a search or sort arrived while the rows were loading; refresh() applies it once they are in.
+        self.reorder_pending = False
+        for col in self.columns:
+            self.tree.heading(col, command=lambda column=col: self.sort_by(column))
             self.tree.column(col, anchor=tk.W, width=150)
+        self.update_headings()
         self.tree.grid(row=0, column=0, sticky="nsew")
         self.tree.tag_configure("even", background=ThemePalette.SURFACE)
         self.tree.tag_configure("odd", background=ThemePalette.SURFACE_ALT)
 
-        tree_scroll = ttk.Scrollbar(list_card, orient=tk.VERTICAL, command=self.tree.yview)
-        tree_scroll.grid(row=0, column=1, sticky="ns", padx=(12, 0))
-        self.tree.configure(yscrollcommand=tree_scroll.set)
+        # The tree only ever holds a window of rows around the visible ones (see render_window), so the scrollbar
+        # works on offsets into view_rows rather than on the tree's own items.
+        self.view_rows: list = []
+        self.row_index: dict[str, int] | None = None
+        # In a sorted list, each key's row as it sits in view_rows, so an edit can find the row's old place.
+        self.placed_rows: dict | None = None
+        self.generation: int | None = None
+        self.rendered: tuple | None = None
+        self.shown_tags: dict[str, str] = {}
+        self.top_row = 0
+        self.window_start = 0
+        self.selected_key: str | None = None
+        self.focused_key: str | None = None
+        self.tree_scroll = ttk.Scrollbar(list_card, orient=tk.VERTICAL, command=self.scroll_rows)
+        self.tree_scroll.grid(row=0, column=1, sticky="ns", padx=(12, 0))
+        self.tree.configure(yscrollcommand=self.tree_scrolled)
+        self.tree.bind("<<TreeviewSelect>>", self.remember_selection)
+        self.tree.bind("<Configure>", lambda _event: self.render_window(self.top_row))
 
         # Actions (edit/delete)
         actions = ttk.Frame(list_card, style="Card.TFrame")
@@ -553,6 +3218,16 @@ class DataListView(ttk.Frame):
         self.cancel_button = ttk.Button(actions, text="Cancel Edit", command=self.cancel_edit, state="disabled")
         self.cancel_button.grid(row=0, column=2)
 
+        pager = ttk.Frame(list_card, style="Card.TFrame")
+        pager.grid(row=2, column=0, columnspan=2, sticky=tk.W, pady=(8, 0))
+        self.page = 0
+        self.prev_button = ttk.Button(pager, text="‹ Previous", command=lambda: self.turn_page(-1))
+        self.prev_button.grid(row=0, column=0, padx=(0, 10))
+        self.page_label = ttk.Label(pager, text="", style="Card.TLabel")
+        self.page_label.grid(row=0, column=1, padx=(0, 10))
+        self.next_button = ttk.Button(pager, text="Next ›", command=lambda: self.turn_page(1))
+        self.next_button.grid(row=0, column=2)
+
         self.form_frame = ttk.LabelFrame(
             list_card,
             text=f"Add {self.get_entity_label()}",
@@ -597,47 +3272,309 @@ class DataListView(ttk.Frame):
             self.form_frame.configure(text=f"Edit {entity}")
         else:
             self.editing_key = None
+            self.editing_record = None
             self.cancel_button.configure(state="disabled")
             self.submit_button.configure(text=f"Add {entity}")
             self.form_frame.configure(text=f"Add {entity}")
 
+    def datasets(self) -> tuple[str, ...]:
+        """Every dataset render() reads, so they can all be parsed off the UI thread first."""
+        return (self.dataset,)
+
     def refresh(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-        for idx, record in enumerate(load_records(self.dataset)):
-            values = [record.get(col, "") for col in self.columns]
-            tag = "even" if idx % 2 == 0 else "odd"
-            self.tree.insert("", tk.END, values=values, tags=(tag,))
+        stamp = tuple(STORE.generation(name) for name in self.datasets())
+        if None in stamp:
+            self.set_loading(True)
+            cold = [name for name, generation in zip(self.datasets(), stamp) if generation is None]
+            loader_for(self).submit(self.dataset, lambda: self.load(cold), lambda _result: self.refresh())
+            return
+        self.set_loading(False)
+        # Unless nothing this view shows, including the datasets it joins against, changed since it last rendered.
+        if stamp != self.rendered:
+            self.render()
+            self.rendered = stamp
+        if self.reorder_pending:
+            self.reorder()
+
+    def load(self, names):
+        # Runs on the loader thread, so the search index and the first sort are built there too rather than on the
+        # first keystroke or render.
+        for name in names:
+            STORE.dataset(name)
+        STORE.prepare_search(self.dataset)
+        if self.sort_column:
+            STORE.prepare_sort(self.dataset, self.sort_column)
+
+    def set_loading(self, loading: bool):
+        self.loading_label.configure(text=f"Loading {self.dataset}…" if loading else "")
+        self.tree.configure(cursor="watch" if loading else "")
+
+    def render(self):
+        self.generation, changed = STORE.changes_since(self.dataset, self.generation)
+        if changed is None:
+            # First show, or the dataset was reloaded from disk: any row may differ, so the window is rebuilt.
+            self.view_rows = self.ordered_rows()
+            self.row_index = self.placed_rows = None
+            self.tree.delete(*self.tree.get_children())
+            self.shown_tags = {}
+        elif changed:
+            self.apply_changes(changed)
+        if changed != [] and self.selected_key is not None and get_record(self.dataset, self.selected_key) is None:
+            self.selected_key = None
+        self.render_window(self.top_row)
         if self.dataset == "classes" and self.tutor_combo and self.student_combo:
-            tutors = load_records("tutors")
-            students = load_records("students")
-            tutor_options = [f"{row['id']} — {row['name']}" for row in tutors]
-            student_options = [f"{row['id']} — {row['name']}" for row in students]
+            tutor_options = [f"{row['id']} — {row['name']}" for row in iter_records("tutors", fields=("id", "name"))]
+            student_options = [f"{row['id']} — {row['name']}" for row in iter_records("students", fields=("id", "name"))]
             self.tutor_combo.configure(values=tutor_options)
             self.student_combo.configure(values=student_options)
 
+    def row_values(self, record) -> list[str]:
+        return [record.get(col, "") for col in self.columns]
+
+    def ordered_rows(self) -> list:
+        """The rows matching the search (all of them without one), in the sorted column's order or else file order."""
+        if self.sort_column:
+            return sorted_records(self.dataset, self.sort_column, self.sort_descending, self.query)
+        rows = search_records(self.dataset, self.query)
+        return load_records(self.dataset) if rows is None else rows
+
+    def sort_by(self, column: str):
+        """Heading click: sorts on ``column``, or flips the direction if the list is already sorted on it."""
+        self.sort_descending = column == self.sort_column and not self.sort_descending
+        self.sort_column = column
+        self.update_headings()
+        self.reorder()
+
+    def update_headings(self):
+        for col in self.columns:
+            arrow = ("  ▼" if self.sort_descending else "  ▲") if col == self.sort_column else ""
+            self.tree.heading(col, text=col.replace("_", " ").title() + arrow)
+
+    def reorder(self):
+        # Search and sort changes re-pick the rows from the cached indexes and go back to the first page.
+        loader = loader_for(self)
+        if loader.busy(self.dataset) or not STORE.is_cached(self.dataset):
+            self.reorder_pending = True
+            if not loader.busy(self.dataset):
+                # The rows went stale on disk; refresh() loads them again.
+                self.refresh()
+            return
+        self.reorder_pending = False
+        self.generation, _changed = STORE.changes_since(self.dataset, None)
+        self.view_rows = self.ordered_rows()
+        self.row_index = self.placed_rows = None
+        self.page = 0
+        self.render_window(0)
+
+    def turn_page(self, step: int):
+        self.page = max(self.page + step, 0)
+        self.render_window(0)
+
+    def page_span(self) -> tuple[int, int]:
+        """Offsets in view_rows of the current page's first row and of the row after its last."""
+        pages = max(-(-len(self.view_rows) // PAGE_ROWS), 1)
+        self.page = min(self.page, pages - 1)
+        first = self.page * PAGE_ROWS
+        return first, min(first + PAGE_ROWS, len(self.view_rows))
+
+    def update_pager(self, first: int, last: int):
+        total = len(self.view_rows)
+        self.page_label.configure(text=f"Rows {first + 1:,}–{last:,} of {total:,}" if total else "No rows")
+        self.prev_button.configure(state="normal" if first else "disabled")
+        self.next_button.configure(state="normal" if last < total else "disabled")
+
+    def search_changed(self):
+        self.query = self.search_var.get()
+        self.selected_key = None
+        self.reorder()
+
+    def apply_changes(self, keys):
+        """Brings view_rows up to date with the changed ``keys``: edited rows are replaced in place (and in the tree if
+        shown), new rows go to the end (or their sorted place) and deleted rows, or rows no longer matching the search,
+        drop out; render_window then sorts out the window."""
+        records = STORE.records(self.dataset)
+        query = self.query if search_terms(self.query) else ""
+        if self.sort_column:
+            self.move_sorted(keys, records, query)
+            return
+        if self.row_index is None:
+            self.row_index = {row[self.unique_field]: index for index, row in enumerate(self.view_rows)}
+        removed = set()
+        for key in keys:
+            row = records.get(key)
+            if row is not None and query and not matches_search(self.dataset, row, query):
+                # Edited out of the search results: dropped like a deleted row.
+                row = None
+            position = self.row_index.get(key)
+            if position is None:
+                if row is not None:
+                    self.row_index[key] = len(self.view_rows)
+                    self.view_rows.append(row)
+            elif row is None:
+                removed.add(key)
+            else:
+                self.view_rows[position] = row
+                if key in self.shown_tags:
+                    self.tree.item(key, values=self.row_values(row))
+        if removed:
+            self.view_rows = [row for row in self.view_rows if row[self.unique_field] not in removed]
+            self.row_index = None
+
+    def move_sorted(self, keys, records, query: str):
+        # Each changed row leaves its old place and, unless deleted or searched out, is inserted where it now sorts;
+        # both places are found by bisecting view_rows.
+        if self.placed_rows is None:
+            self.placed_rows = {row[self.unique_field]: row for row in self.view_rows}
+        for key in keys:
+            old = self.placed_rows.pop(key, None)
+            if old is not None:
+                position = self.sorted_position(old)
+                if position == len(self.view_rows) or self.view_rows[position] is not old:
+                    # Not where the sort says it should be; pick the rows afresh rather than guess.
+                    self.view_rows = self.ordered_rows()
+                    self.row_index = self.placed_rows = None
+                    return
+                del self.view_rows[position]
+            row = records.get(key)
+            if row is None or query and not matches_search(self.dataset, row, query):
+                continue
+            self.view_rows.insert(self.sorted_position(row), row)
+            self.placed_rows[key] = row
+            if key in self.shown_tags:
+                self.tree.item(key, values=self.row_values(row))
+        self.row_index = None
+
+    def sorted_position(self, row) -> int:
+        """Offset in view_rows of ``row``, or where it would go, under the current sort (ties go by key)."""
+        wanted = (sort_key(self.dataset, self.sort_column, row), row[self.unique_field])
+        low, high = 0, len(self.view_rows)
+        while low < high:
+            middle = (low + high) // 2
+            other = self.view_rows[middle]
+            placed = (sort_key(self.dataset, self.sort_column, other), other[self.unique_field])
+            if placed > wanted if self.sort_descending else placed < wanted:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def visible_rows(self) -> int:
+        rowheight = int(ttk.Style(self).lookup("Data.Treeview", "rowheight") or 28)
+        return max(self.tree.winfo_height() // rowheight, 10)
+
+    def render_window(self, top: int):
+        """Shows the current page's rows from ``top`` down plus LIST_BUFFER_ROWS either side, with the record key as
+        each item's iid.
+
+        Items already in the tree stay; only rows entering or leaving the window, and rows whose stripe flips, touch
+        the widget.
+        """
+        first, last = self.page_span()
+        total = last - first
+        visible = self.visible_rows()
+        top = max(0, min(top, total - visible))
+        start = max(0, top - LIST_BUFFER_ROWS)
+        end = min(total, top + visible + LIST_BUFFER_ROWS)
+        wanted = {record[self.unique_field]: record for record in self.view_rows[first + start:first + end]}
+        shown = self.tree.get_children()
+        # Like the selection, the keyboard focus (which arrow keys move from) is remembered while its row is out of
+        # the window and put back on the item when the row is shown again.
+        self.focused_key = self.tree.focus() or self.focused_key
+        kept = [key for key in shown if key in wanted]
+        if len(kept) < len(shown):
+            self.tree.delete(*(key for key in shown if key not in wanted))
+        kept_keys = set(kept)
+        if kept != [key for key in wanted if key in kept_keys]:
+            # Rows changed order; re-insert them rather than moving items one by one.
+            self.tree.delete(*kept)
+            kept_keys = set()
+        tags = {}
+        for position, (key, record) in enumerate(wanted.items()):
+            tag = "even" if (start + position) % 2 == 0 else "odd"
+            if key not in kept_keys:
+                self.tree.insert("", position, iid=key, values=self.row_values(record), tags=(tag,))
+            elif self.shown_tags.get(key) != tag:
+                self.tree.item(key, tags=(tag,))
+            tags[key] = tag
+        self.shown_tags = tags
+        if self.selected_key is not None and self.tree.exists(self.selected_key):
+            self.tree.selection_set(self.selected_key)
+        if self.focused_key is not None and self.tree.exists(self.focused_key):
+            self.tree.focus(self.focused_key)
+        self.tree.yview_moveto(0)
+        self.tree.yview_scroll(top - start, "units")
+        self.top_row, self.window_start = top, start
+        self.update_scrollbar()
+        self.update_pager(first, last)
+
+    def tree_scrolled(self, first, last):
+        # The tree scrolled within its window (mouse wheel, arrow keys): work out the top row, and slide the window
+        # along once fewer than half the buffer rows are left on that side.
+        shown = len(self.tree.get_children())
+        self.top_row = self.window_start + round(float(first) * shown)
+        margin = LIST_BUFFER_ROWS // 2
+        if (self.window_start and self.top_row < self.window_start + margin) or (
+            self.window_start + shown < self.page_length() and self.top_row + self.visible_rows() > self.window_start + shown - margin
+        ):
+            self.render_window(self.top_row)
+        else:
+            self.update_scrollbar()
+
+    def page_length(self) -> int:
+        first, last = self.page_span()
+        return last - first
+
+    def update_scrollbar(self):
+        total = self.page_length()
+        if not total:
+            self.tree_scroll.set(0, 1)
+            return
+        self.tree_scroll.set(self.top_row / total, min((self.top_row + self.visible_rows()) / total, 1))
+
+    def scroll_rows(self, action, amount, unit=None):
+        if action == "moveto":
+            top = int(float(amount) * self.page_length())
+        else:
+            top = self.top_row + int(amount) * (self.visible_rows() if unit == "pages" else 1)
+        self.render_window(top)
+
+    def remember_selection(self, _event=None):
+        # Scrolling the selected row out of the window drops it from the tree, but not from selected_key; an empty
+        # selection while the row is still in the window means the user deselected it.
+        selection = self.tree.selection()
+        if selection:
+            self.selected_key = selection[0]
+        elif self.selected_key is not None and self.tree.exists(self.selected_key):
+            self.selected_key = None
+
     def get_selected_key(self) -> str:
         selection = self.tree.selection()
-        if not selection:
+        key = selection[0] if selection else self.selected_key
+        if not key:
             messagebox.showinfo("Select a row", "Please choose a record first.")
             return ""
-        values = self.tree.item(selection[0], "values")
-        try:
-            index = self.columns.index(self.unique_field)
-        except ValueError:
-            index = 0
-        return values[index]
+        return key
+
+    def shown_record(self, key) -> dict[str, str] | None:
+        """The row for ``key`` as the user last saw it: the one open in the form, else the one in the list."""
+        if self.editing_key == key and self.editing_record is not None:
+            return self.editing_record
+        if self.row_index is None:
+            self.row_index = {row[self.unique_field]: index for index, row in enumerate(self.view_rows)}
+        position = self.row_index.get(key)
+        return self.view_rows[position] if position is not None else None
 
     def start_edit(self):
         key = self.get_selected_key()
         if not key:
             return
-        records = load_records(self.dataset)
-        record = next((row for row in records if row.get(self.unique_field) == key), None)
+        record = first_record(self.dataset, where={self.unique_field: key})
         if not record:
             messagebox.showerror("Not found", "Could not load the selected record.")
             return
         self.editing_key = key
+        self.editing_record = record
+        self.editing_version = STORE.version(self.dataset)
         self.populate_form(record)
         self.set_mode("edit")
 
@@ -659,6 +3596,9 @@ class DataListView(ttk.Frame):
         if self.perform_update(self.editing_key):
             self.refresh()
             self.reset_form()
+        elif STORE.version(self.dataset) != self.editing_version:
+            # Another copy of the app saved this dataset meanwhile; show its rows.
+            self.refresh()
 
     def perform_update(self, key: str) -> bool:
         raise NotImplementedError
@@ -667,9 +3607,10 @@ class DataListView(ttk.Frame):
         key = self.get_selected_key()
         if not key:
             return
+        expected = self.shown_record(key)
         if messagebox.askyesno("Confirm delete", "Are you sure you want to remove this record?"):
             try:
-                delete_record(self.dataset, key)
+                delete_record(self.dataset, key, expected)
             except ValueError as exc:
                 messagebox.showerror("Could not delete", str(exc))
                 return
@@ -713,8 +3654,8 @@ class UsersView(DataListView):
         self.delete_button.configure(state="disabled")
         self.cancel_button.configure(state="disabled")
 
-    def refresh(self):
-        super().refresh()
+    def render(self):
+        super().render()
         if self.current_user.get("role") != "Manager":
             self.disable_form()
 
@@ -757,7 +3698,7 @@ class UsersView(DataListView):
             return False
         record = {"username": username, "password": password, "role": role}
         try:
-            update_record("users", key, record)
+            update_record("users", key, record, expected=self.editing_record)
         except ValueError as exc:
             messagebox.showerror("Could not update user", str(exc))
             return False
@@ -792,9 +3733,8 @@ class TutorsView(DataListView):
         if not is_valid_email(email):
             messagebox.showerror("Invalid email", "Please enter a valid email address.")
             return
-        records = load_records("tutors")
-        new_id = generate_id("T", records)
-        record = {"id": new_id, "name": name, "email": email, "subjects": subjects.replace(",", ";")}
+        new_id = next_id("tutors")
+        record = {"id": new_id, "name": name, "email": email, "subjects": clean_subjects(subjects)}
         append_record("tutors", record)
         self.refresh()
         self.reset_form()
@@ -818,10 +3758,10 @@ class TutorsView(DataListView):
             "id": key,
             "name": name,
             "email": email,
-            "subjects": subjects.replace(",", ";"),
+            "subjects": clean_subjects(subjects),
         }
         try:
-            update_record("tutors", key, record)
+            update_record("tutors", key, record, expected=self.editing_record)
         except ValueError as exc:
             messagebox.showerror("Could not update tutor", str(exc))
             return False
@@ -844,8 +3784,7 @@ class StudentsView(DataListView):
         if not is_valid_email(email):
             messagebox.showerror("Invalid email", "Please enter a valid email address.")
             return
-        records = load_records("students")
-        new_id = generate_id("S", records)
+        new_id = next_id("students")
         record = {"id": new_id, "name": name, "email": email, "year": year}
         append_record("students", record)
         self.refresh()
@@ -863,42 +3802,125 @@ class StudentsView(DataListView):
             return False
         record = {"id": key, "name": name, "email": email, "year": year}
         try:
-            update_record("students", key, record)
+            update_record("students", key, record, expected=self.editing_record)
         except ValueError as exc:
             messagebox.showerror("Could not update student", str(exc))
             return False
         return True
 
 
+ALL_SUBJECTS = "All subjects"
+
+
 class ClassesView(DataListView):
-    columns = ("id", "title", "tutor_id", "student_id", "schedule")
+    columns = ("id", "title", "tutor_id", "student_id", "schedule", "duration", "start_date", "end_date")
     dataset = "classes"
-    add_fields = (("title", "Class Title"),)
+    default_sort = "schedule"
+    add_fields = (
+        ("title", "Class Title"),
+        ("start_date", "Start Date (YYYY-MM-DD)"),
+        ("end_date", "End Date (blank = ongoing)"),
+        ("interval", "Every N Weeks"),
+        ("exceptions", "Skip Dates (comma separated)"),
+    )
     singular = "Class"
 
     def create_widgets(self):
         super().create_widgets()
-        start_row = len(self.add_fields)
+        start_row = len(self.add_fields) + 1
+
+        ttk.Label(self.form_frame, text="Subject", style="Card.TLabel").grid(row=start_row - 1, column=0, sticky=tk.W, padx=5, pady=5)
+        self.subject_combo = ttk.Combobox(self.form_frame, state="readonly", width=28)
+        self.subject_combo.grid(row=start_row - 1, column=1, sticky=tk.W, padx=5, pady=5)
+        self.subject_combo.bind("<<ComboboxSelected>>", lambda _event: self.filter_tutors())
 
         ttk.Label(self.form_frame, text="Tutor", style="Card.TLabel").grid(row=start_row, column=0, sticky=tk.W, padx=5, pady=5)
         self.tutor_combo = ttk.Combobox(self.form_frame, state="readonly", width=28)
         self.tutor_combo.grid(row=start_row, column=1, sticky=tk.W, padx=5, pady=5)
+        self.tutor_combo.bind("<<ComboboxSelected>>", lambda _event: self.update_availability())
 
         ttk.Label(self.form_frame, text="Student", style="Card.TLabel").grid(row=start_row + 1, column=0, sticky=tk.W, padx=5, pady=5)
         self.student_combo = ttk.Combobox(self.form_frame, state="readonly", width=28)
         self.student_combo.grid(row=start_row + 1, column=1, sticky=tk.W, padx=5, pady=5)
+        self.student_combo.bind("<<ComboboxSelected>>", lambda _event: self.update_availability())
 
         ttk.Label(self.form_frame, text="Schedule", style="Card.TLabel").grid(row=start_row + 2, column=0, sticky=tk.NW, padx=5, pady=5)
         self.schedule_selector = ScheduleSelector(self.form_frame)
         self.schedule_selector.grid(row=start_row + 2, column=1, sticky=tk.W, padx=5, pady=5)
+        self.suggest_button = ttk.Button(self.form_frame, text="Suggest Slot", command=self.suggest_slot)
+        self.suggest_button.grid(row=start_row + 3, column=1, sticky=tk.W, padx=5, pady=(0, 5))
+        for field in ("start_date", "end_date"):
+            self.form_vars[field].trace_add("write", lambda *_: self.update_availability())
 
-        self.submit_button.grid_configure(row=start_row + 3, columnspan=2)
+        self.submit_button.grid_configure(row=start_row + 4, columnspan=2)
 
-    def refresh(self):
-        super().refresh()
+    def datasets(self) -> tuple[str, ...]:
+        return ("classes", "tutors", "students")
+
+    def render(self):
+        super().render()
+        if getattr(self, "subject_combo", None):
+            self.subject_combo.configure(values=[ALL_SUBJECTS] + subject_index().subjects())
+            self.filter_tutors()
         if getattr(self, "schedule_selector", None):
             self.schedule_selector.refresh()
 
+    def chosen_subject(self) -> str:
+        subject = self.subject_combo.get()
+        return "" if subject == ALL_SUBJECTS else subject
+
+    def filter_tutors(self):
+        """Offers only the tutors teaching the chosen subject, read from the subject index."""
+        subject = self.chosen_subject()
+        if not subject:
+            self.tutor_combo.configure(values=[f"{row['id']} — {row['name']}" for row in iter_records("tutors", fields=("id", "name"))])
+            return
+        teaching = tutors_teaching(subject)
+        self.tutor_combo.configure(values=[f"{tutor_id} — {(get_record('tutors', tutor_id) or {}).get('name', tutor_id)}" for tutor_id in teaching])
+        if self.tutor_combo.get() and self.tutor_combo.get().split(" — ")[0] not in teaching:
+            self.tutor_combo.set("")
+            self.update_availability()
+
+    def recurrence_fields(self) -> dict[str, str] | None:
+        recurrence = {field: self.form_vars[field].get() for field in RECURRENCE_FIELDS}
+        error = clean_recurrence(recurrence)
+        if error:
+            messagebox.showwarning("Invalid dates", error)
+            return None
+        return recurrence
+
+    def suggest_slot(self):
+        tutor_id = self.tutor_combo.get().split(" — ")[0]
+        student_id = self.student_combo.get().split(" — ")[0]
+        subject = self.chosen_subject() or self.form_vars["title"].get().strip()
+        if not student_id or not (tutor_id or subject):
+            messagebox.showinfo("Suggest slot", "Choose a student, then a tutor or a subject (or a class title naming one).")
+            return
+        duration = self.schedule_selector.get_duration()
+        recurrence = self.recurrence_fields() if duration else None
+        if recurrence is None:
+            return
+        scheduler = Scheduler()
+        if self.editing_record:
+            scheduler.release(self.editing_record)
+        choice = scheduler.suggest(student_id, subject, tutor_id, duration=duration, start_date=recurrence["start_date"], end_date=recurrence["end_date"])
+        if choice is None:
+            reason = f"{tutor_id} and {student_id} share no free slot." if tutor_id else f"No tutor teaching {subject} has a free slot with {student_id}."
+            messagebox.showinfo("No free slot", reason)
+            return
+        tutor_id, schedule = choice
+        if not self.tutor_combo.get():
+            tutor_name = (get_record("tutors", tutor_id) or {}).get("name", tutor_id)
+            self.tutor_combo.set(f"{tutor_id} — {tutor_name}")
+        self.update_availability()
+        self.schedule_selector.set_schedule(schedule)
+
+    def update_availability(self):
+        tutor_id = self.tutor_combo.get().split(" — ")[0]
+        student_id = self.student_combo.get().split(" — ")[0]
+        self.schedule_selector.set_term(self.form_vars["start_date"].get().strip(), self.form_vars["end_date"].get().strip())
+        self.schedule_selector.set_participants(tutor_id, student_id)
+
     def add_record(self):
         title = self.form_vars["title"].get().strip()
         tutor_value = self.tutor_combo.get()
@@ -908,26 +3930,30 @@ class ClassesView(DataListView):
             messagebox.showwarning("Missing data", "Please complete all fields.")
             return
 
-        schedule = self.schedule_selector.get_schedule()
+        duration = self.schedule_selector.get_duration()
+        schedule = self.schedule_selector.get_schedule() if duration else ""
         if not schedule:
             return
 
         tutor_id = tutor_value.split(" — ")[0]
         student_id = student_value.split(" — ")[0]
+        recurrence = self.recurrence_fields()
+        if recurrence is None:
+            return
 
-        classes = load_records("classes")
-        for lesson in classes:
-            if lesson["schedule"] == schedule and (lesson["tutor_id"] == tutor_id or lesson["student_id"] == student_id):
-                messagebox.showerror("Schedule conflict", "The selected tutor or student already has a class at this time.")
-                return
+        if find_schedule_conflict(schedule, tutor_id, student_id, start_date=recurrence["start_date"], end_date=recurrence["end_date"], duration=duration):
+            messagebox.showerror("Schedule conflict", "The selected tutor or student already has a class at this time.")
+            return
 
-        new_id = generate_id("C", classes)
+        new_id = next_id("classes")
         record = {
             "id": new_id,
             "title": title,
             "tutor_id": tutor_id,
             "student_id": student_id,
             "schedule": schedule,
+            "duration": duration,
+            **recurrence,
         }
         append_record("classes", record)
         self.refresh()
@@ -935,28 +3961,36 @@ class ClassesView(DataListView):
 
     def populate_form(self, record: dict[str, str]):
         super().populate_form(record)
-        tutors = {row["id"]: row.get("name", row["id"]) for row in load_records("tutors")}
-        students = {row["id"]: row.get("name", row["id"]) for row in load_records("students")}
+        self.form_vars["exceptions"].set(record.get("exceptions", "").replace(";", ", "))
         tutor_value = record.get("tutor_id", "")
         student_value = record.get("student_id", "")
-        tutor_display = f"{tutor_value} — {tutors.get(tutor_value, tutor_value)}" if tutor_value else ""
-        student_display = f"{student_value} — {students.get(student_value, student_value)}" if student_value else ""
+        tutor_name = (get_record("tutors", tutor_value) or {}).get("name", tutor_value)
+        student_name = (get_record("students", student_value) or {}).get("name", student_value)
+        tutor_display = f"{tutor_value} — {tutor_name}" if tutor_value else ""
+        student_display = f"{student_value} — {student_name}" if student_value else ""
         self.tutor_combo.set(tutor_display)
         self.student_combo.set(student_display)
         schedule = record.get("schedule", "")
-        self.schedule_selector.allow_schedule(schedule)
+        self.schedule_selector.allow_class(record)
+        self.schedule_selector.set_duration(record.get("duration", ""))
+        self.update_availability()
         self.schedule_selector.refresh()
         self.schedule_selector.set_schedule(schedule)
 
     def reset_form(self):
         super().reset_form()
+        if getattr(self, "subject_combo", None):
+            self.subject_combo.set(ALL_SUBJECTS)
+            self.filter_tutors()
         if self.tutor_combo:
             self.tutor_combo.set("")
         if self.student_combo:
             self.student_combo.set("")
         if hasattr(self, "schedule_selector"):
-            self.schedule_selector.allow_schedule("")
+            self.schedule_selector.allow_class(None)
+            self.schedule_selector.set_duration("")
             self.schedule_selector.clear_selection()
+            self.update_availability()
             self.schedule_selector.refresh()
 
     def perform_update(self, key: str) -> bool:
@@ -966,27 +4000,29 @@ class ClassesView(DataListView):
         if not title or not tutor_value or not student_value:
             messagebox.showwarning("Missing data", "Please complete all fields.")
             return False
-        schedule = self.schedule_selector.get_schedule()
+        duration = self.schedule_selector.get_duration()
+        schedule = self.schedule_selector.get_schedule() if duration else ""
         if not schedule:
             return False
         tutor_id = tutor_value.split(" — ")[0]
         student_id = student_value.split(" — ")[0]
-        classes = load_records("classes")
-        for lesson in classes:
-            if lesson["id"] == key:
-                continue
-            if lesson["schedule"] == schedule and (lesson["tutor_id"] == tutor_id or lesson["student_id"] == student_id):
-                messagebox.showerror("Schedule conflict", "The selected tutor or student already has a class at this time.")
-                return False
+        recurrence = self.recurrence_fields()
+        if recurrence is None:
+            return False
+        if find_schedule_conflict(schedule, tutor_id, student_id, exclude_key=key, start_date=recurrence["start_date"], end_date=recurrence["end_date"], duration=duration):
+            messagebox.showerror("Schedule conflict", "The selected tutor or student already has a class at this time.")
+            return False
         record = {
             "id": key,
             "title": title,
             "tutor_id": tutor_id,
             "student_id": student_id,
             "schedule": schedule,
+            "duration": duration,
+            **recurrence,
         }
         try:
-            update_record("classes", key, record)
+            update_record("classes", key, record, expected=self.editing_record)
         except ValueError as exc:
             messagebox.showerror("Could not update class", str(exc))
             return False
@@ -1053,19 +4089,13 @@ class EmailService:
         self.log_path = log_path
 
     def send_daily_tutor_reminders(self):
-        today = dt.date.today().strftime("%a")
-        classes = load_records("classes")
-        tutors = {row["id"]: row for row in load_records("tutors")}
-        students = {row["id"]: row for row in load_records("students")}
+        today = dt.date.today()
         reminders: dict[str, list[str]] = defaultdict(list)
-        for lesson in classes:
-            day, _, _time = lesson.get("schedule", "   ").partition(" ")
-            if day != today:
-                continue
-            tutor = tutors.get(lesson["tutor_id"], {})
-            student = students.get(lesson["student_id"], {})
+        for start, lesson in class_occurrences(today, today):
+            tutor = get_record("tutors", lesson["tutor_id"]) or {}
+            student = get_record("students", lesson["student_id"]) or {}
             reminders[tutor.get("email", "unknown")].append(
-                f"{lesson['schedule']} — {lesson['title']} with {student.get('name', 'Unknown')}"
+                f"{start:%a} {session_times(start, lesson)} — {lesson['title']} with {student.get('name', 'Unknown')}"
             )
         timestamp = dt.datetime.now().isoformat(timespec="seconds")
         with self.log_path.open("a", encoding="utf-8") as log:
@@ -1083,16 +4113,23 @@ class ScheduleSelector(ttk.Frame):
     def __init__(self, master):
         super().__init__(master, style="Card.TFrame")
         self.day_var = tk.StringVar(value=DAYS[0])
-        self.occupied_by_day: dict[str, set[str]] = {day: set() for day in DAYS}
-        self._allowed_schedule: str = ""
+        self.busy_mask = 0
+        self._participants: tuple[str, str] = ("", "")
+        self._term: tuple[str, str] = ("", "")
+        self._computed_for: tuple | None = None
+        self._allowed: tuple[str, str, str] | None = None
         self._selected: tuple[str, str] | None = None
+        self.duration_var = tk.StringVar(value=str(DEFAULT_DURATION))
         ttk.Label(self, text="Day", style="Card.TLabel").grid(row=0, column=0, sticky=tk.W)
         self.day_combo = ttk.Combobox(self, textvariable=self.day_var, values=DAYS, state="readonly", width=10)
-        self.day_combo.grid(row=1, column=0, sticky=tk.W)
-        ttk.Label(self, text="Time Slot", style="Card.TLabel").grid(row=0, column=1, sticky=tk.W, padx=(10, 0))
+        self.day_combo.grid(row=1, column=0, sticky=tk.NW)
+        ttk.Label(self, text="Minutes", style="Card.TLabel").grid(row=2, column=0, sticky=tk.W, pady=(10, 0))
+        self.duration_combo = ttk.Combobox(self, textvariable=self.duration_var, values=DURATIONS, width=10)
+        self.duration_combo.grid(row=3, column=0, sticky=tk.NW)
+        ttk.Label(self, text="Start Time", style="Card.TLabel").grid(row=0, column=1, sticky=tk.W, padx=(10, 0))
         self.times_list = tk.Listbox(
             self,
-            height=len(TIME_SLOTS),
+            height=len(TIME_SLOTS) // 2,
             exportselection=False,
             width=16,
             bg=ThemePalette.SURFACE_ALT,
@@ -1104,32 +4141,71 @@ class ScheduleSelector(ttk.Frame):
             highlightthickness=0,
             activestyle="none",
         )
-        self.times_list.grid(row=1, column=1, sticky=tk.NW, padx=(10, 0))
+        self.times_list.grid(row=1, column=1, rowspan=4, sticky=tk.NW, padx=(10, 0))
+        scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.times_list.yview)
+        scrollbar.grid(row=1, column=2, rowspan=4, sticky=tk.NS)
+        self.times_list.configure(yscrollcommand=scrollbar.set)
         self.current_times: list[str] = []
         self.day_var.trace_add("write", lambda *_: self.render_times())
-        self.refresh()
+        self.duration_var.trace_add("write", lambda *_: self.render_times())
+        self.render_times()
+
+    def set_participants(self, tutor_id: str, student_id: str):
+        """Shows the slots where both the tutor and the student are free (either may be blank)."""
+        if (tutor_id, student_id) != self._participants:
+            self._participants = (tutor_id, student_id)
+            self.refresh()
+
+    def set_term(self, start_date: str, end_date: str):
+        """Counts only the classes whose term overlaps start_date..end_date as busy."""
+        if (start_date, end_date) != self._term:
+            self._term = (start_date, end_date)
+            self.refresh()
 
     def refresh(self):
-        self.occupied_by_day = {day: set() for day in DAYS}
-        for lesson in load_records("classes"):
-            day, _, time = lesson.get("schedule", "   ").partition(" ")
-            if day in self.occupied_by_day and time:
-                self.occupied_by_day[day].add(time)
-        if self._allowed_schedule:
-            day, time = self._split_schedule(self._allowed_schedule)
-            if day in self.occupied_by_day and time:
-                self.occupied_by_day[day].discard(time)
+        if not STORE.is_cached("classes"):
+            # Parsed on the loader thread; the times stay as they were until the classes are in memory.
+            loader_for(self).submit("schedule-selector", lambda: STORE.dataset("classes"), lambda _classes: self.refresh())
+            return
+        # Only recomputed when the tutor/student pair, the class being edited, the term or the class occupancy changed
+        # (with a term, any class edit, since one may have moved its dates).
+        occupancy = class_occupancy()
+        stamp = (occupancy.version, STORE.generation("classes") if any(self._term) else None, self._participants, self._allowed, self._term)
+        if stamp == self._computed_for:
+            return
+        self._computed_for = stamp
+        tutor_id, student_id = self._participants
+        busy = occupancy.busy(tutor_id or None, student_id or None)
+        if busy and any(self._term):
+            # The occupancy bits hold every class whatever its term; keep the cells of those overlapping this one.
+            key = self._allowed[0] if self._allowed else None
+            busy = term_cells("tutor_id", tutor_id, *self._term, key) | term_cells("student_id", student_id, *self._term, key)
+        elif self._allowed:
+            key, schedule, duration = self._allowed
+            day = schedule_slot(schedule)[0]
+            kept = other_cells("tutor_id", tutor_id, day, key) | other_cells("student_id", student_id, day, key)
+            busy &= ~(session_cells(schedule, duration) & ~kept)
+        self.busy_mask = busy
         self.render_times()
 
+    def is_taken(self, day: str, time_value: str) -> bool:
+        """Whether a session of the chosen length starting at ``time_value`` overlaps a busy cell or runs past closing."""
+        schedule = f"{day} {time_value}"
+        duration = self.duration_var.get().strip()
+        return bool(check_session(schedule, duration) or self.busy_mask & session_cells(schedule, duration))
+
     def render_times(self):
         day = self.day_var.get() or DAYS[0]
         self.times_list.delete(0, tk.END)
         self.current_times = []
-        taken = self.occupied_by_day.get(day, set())
-        for idx, slot in enumerate(TIME_SLOTS):
+        times = TIME_SLOTS
+        if self._selected and self._selected[0] == day and self._selected[1] not in TIME_SLOTS:
+            # A class imported at an off-grid time such as 10:15 keeps its start selectable.
+            times = sorted(TIME_SLOTS + [self._selected[1]])
+        for idx, slot in enumerate(times):
             self.current_times.append(slot)
             self.times_list.insert(tk.END, slot)
-            if slot in taken:
+            if self.is_taken(day, slot):
                 self.times_list.itemconfig(idx, {"bg": ThemePalette.SLOT_TAKEN_BG, "fg": ThemePalette.SLOT_TAKEN_FG})
             else:
                 self.times_list.itemconfig(idx, {"bg": ThemePalette.SLOT_AVAILABLE_BG, "fg": ThemePalette.SLOT_AVAILABLE_FG})
@@ -1141,14 +4217,25 @@ class ScheduleSelector(ttk.Frame):
         index = self.times_list.curselection()[0]
         time_value = self.current_times[index]
         day = self.day_var.get()
-        if time_value in self.occupied_by_day.get(day, set()):
-            messagebox.showerror("Time unavailable", "The selected time slot is already booked.")
+        if self.is_taken(day, time_value):
+            messagebox.showerror("Time unavailable", "The selected tutor or student already has a class at this time.")
             return ""
         self._selected = (day, time_value)
         return f"{day} {time_value}"
 
-    def allow_schedule(self, schedule: str):
-        self._allowed_schedule = schedule or ""
+    def get_duration(self) -> str:
+        duration = self.duration_var.get().strip()
+        if not duration.isdigit() or int(duration) < 1:
+            messagebox.showerror("Invalid length", "Enter the session length as a whole number of minutes.")
+            return ""
+        return str(int(duration))
+
+    def set_duration(self, duration: str):
+        self.duration_var.set(duration or str(DEFAULT_DURATION))
+
+    def allow_class(self, record):
+        """Treats ``record``'s own session as free while that class is being edited (None when adding)."""
+        self._allowed = (record["id"], record["schedule"], record.get("duration", "")) if record else None
 
     def set_schedule(self, schedule: str):
         if not schedule:
@@ -1197,8 +4284,25 @@ class TutorRenApp(tk.Tk):
         self.minsize(*LOGIN_MINSIZE)
         self.resizable(False, False)
         self.current_user = None
+        STORE.write_delay = WRITE_BEHIND_SECONDS
+        self.loader = BackgroundLoader(self)
+        self.protocol("WM_DELETE_WINDOW", self.shutdown)
         self.show_login()
 
+    def flush_pending_writes(self) -> bool:
+        try:
+            STORE.flush()
+        except OSError as exc:
+            if not messagebox.askyesno("Could not save changes", f"Recent changes could not be written:\n{exc}\n\nContinue anyway and lose them?"):
+                return False
+            STORE.discard_pending()
+        return True
+
+    def shutdown(self):
+        if self.flush_pending_writes():
+            self.loader.shutdown()
+            self.destroy()
+
     def show_login(self):
         self.current_user = None
         for child in self.winfo_children():
@@ -1220,6 +4324,60 @@ class TutorRenApp(tk.Tk):
         Dashboard(self, self.current_user)
 
 
+def backup_directory() -> Path:
+    return EXPORT_DIR / f"backup-{dt.datetime.now().strftime('%Y%m%d-%H%M%S')}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=APP_TITLE)
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("migrate-sqlite", help="copy the CSV datasets into the SQLite database, replacing its tables")
+    export_parser = commands.add_parser("export-csv", help="write every dataset to CSV files")
+    export_parser.add_argument("directory", nargs="?", type=Path, help="target directory (defaults to a new folder under data/exports)")
+    import_parser = commands.add_parser("import", help="bulk-add tutors, students or classes from a CSV or JSONL file")
+    import_parser.add_argument("dataset", choices=IMPORTABLE_DATASETS)
+    import_parser.add_argument("file", type=Path)
+    import_parser.add_argument("--dry-run", action="store_true", help="validate the file without saving anything")
+    schedule_parser = commands.add_parser("schedule", help="assign tutors and slots to lesson requests (student_id, subject, sessions, days, optional duration/start_date/end_date/interval/exceptions) from a CSV or JSONL file")
+    schedule_parser.add_argument("file", type=Path)
+    schedule_parser.add_argument("--dry-run", action="store_true", help="print the plan without adding any classes")
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate-sqlite":
+        try:
+            copied = migrate_to_sqlite()
+        except ValueError as exc:
+            print(exc, file=sys.stderr)
+            return 1
+        for name, count in copied.items():
+            print(f"{name}: {count} rows")
+        print(f"Database written to {SQLITE_PATH}. Set TUTORREN_STORAGE=sqlite to use it.")
+    elif args.command == "export-csv":
+        for path in export_csv_backups(args.directory or backup_directory()):
+            print(path)
+    elif args.command == "import":
+        report = import_file(args.dataset, args.file, dry_run=args.dry_run)
+        for line_no, error in report.errors:
+            print(f"{args.file}:{line_no}: {error}")
+        print(report.summary())
+        return 1 if report.errors else 0
+    elif args.command == "schedule":
+        report = schedule_file(args.file, dry_run=args.dry_run)
+        for record in report.assigned:
+            print(f"{record['id'] or '-'}\t{record['student_id']}\t{record['title']}\t{record['tutor_id']}\t{record['schedule']}")
+        for line_no, error in report.errors:
+            print(f"{args.file}:{line_no}: {error}")
+        print(report.summary())
+        return 1 if report.errors else 0
+    else:
+        app = TutorRenApp()
+        app.mainloop()
+        try:
+            STORE.flush()
+        except OSError as exc:
+            print(f"Recent changes could not be written: {exc}", file=sys.stderr)
+            return 1
+
+
 if __name__ == "__main__":
-    app = TutorRenApp()
-    app.mainloop()
+    sys.exit(main())
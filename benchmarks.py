@@ -0,0 +1,306 @@
+"""Timing scripts for the data layer. Run e.g. ``python benchmarks.py offsets --rows 500000``.
+
+Each benchmark works on generated data in a temporary directory and never touches data/.
+"""
+import argparse
+import csv
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import app
+
+
+def timed(func, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def write_students(directory: Path, rows: int):
+    spec = app.DATA_SPECS["students"]
+    with (directory / spec["filename"]).open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(spec["headers"])
+        for number in range(1, rows + 1):
+            writer.writerow([app.format_id("S", number), f"Student {number}", f"student{number}@example.com", str(7 + number % 6)])
+
+
+def bench_offsets(args):
+    directory = Path(tempfile.mkdtemp(prefix="tutorren-bench-"))
+    try:
+        write_students(directory, args.rows)
+        keys = [app.format_id("S", random.randint(1, args.rows)) for _ in range(args.lookups)]
+        size_mb = (directory / "students.csv").stat().st_size / 2**20
+        print(f"students.csv: {args.rows} rows, {size_mb:.1f} MiB")
+
+        def linear_search():
+            # What a single-row read cost before: parse the whole file, then scan it.
+            app.STORE = app.RecordStore(app.CsvBackend(directory))
+            key = random.choice(keys)
+            return next(row for row in app.load_records("students") if row["id"] == key)
+
+        seconds, _ = timed(linear_search, args.scans)
+        print(f"load_records + linear search: {seconds * 1000:10.1f} ms per lookup")
+
+        backend = app.CsvBackend(directory)
+        seconds, _ = timed(lambda: backend.read_one("students", keys[0]))
+        print(f"offset index build (first read): {seconds * 1000:7.1f} ms")
+        seconds, _ = timed(lambda: [backend.read_one("students", key) for key in keys])
+        print(f"offset index + mmap read: {seconds / len(keys) * 1e6:14.1f} us per lookup")
+
+        store = app.RecordStore(backend)
+        store.append("students", {"id": app.format_id("S", args.rows + 1), "name": "New", "email": "new@example.com", "year": "9"})
+        seconds, row = timed(lambda: backend.read_one("students", app.format_id("S", args.rows + 1)))
+        print(f"read after append (incremental): {seconds * 1000:6.1f} ms  -> {row['id']}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def generate_classes(count: int, rng: random.Random) -> list[dict[str, str]]:
+    tutors = max(count // 20, 1)
+    students = max(count // 5, 1)
+    return [
+        {
+            "id": app.format_id("C", number),
+            "title": "Lesson",
+            "tutor_id": app.format_id("T", rng.randint(1, tutors)),
+            "student_id": app.format_id("S", rng.randint(1, students)),
+            "schedule": rng.choice(app.SLOT_SCHEDULES),
+        }
+        for number in range(1, count + 1)
+    ]
+
+
+def bench_occupancy(args):
+    rng = random.Random(args.seed)
+    for count in args.sizes:
+        rows = generate_classes(count, rng)
+        seconds, cached = timed(lambda: app.CachedDataset("classes", None, app.index_records("classes", rows)))
+        occupancy = cached.indexes["occupancy"]
+        probes = [(rng.choice(app.SLOT_SCHEDULES), row["tutor_id"], row["student_id"]) for row in rng.choices(rows, k=args.checks)]
+
+        def bitset_checks():
+            return sum(not occupancy.is_free(*probe) for probe in probes)
+
+        def string_scan():
+            # The old check: compare the schedule string against every class.
+            schedule, tutor_id, student_id = probes[0]
+            return any(row["schedule"] == schedule and (row["tutor_id"] == tutor_id or row["student_id"] == student_id) for row in rows)
+
+        per_check, _ = timed(bitset_checks)
+        scan, _ = timed(string_scan, 3)
+        tutors = list(occupancy.masks["tutor_id"])
+        bulk, _ = timed(lambda: occupancy.free_counts(tutors, probes[0][2]))
+        print(
+            f"{count:>9} classes: build {seconds:7.2f} s | bitset check {per_check / len(probes) * 1e6:6.2f} us"
+            f" | string scan {scan * 1000:9.2f} ms | free slots for {len(tutors)} tutors {bulk * 1000:7.2f} ms"
+            f" ({'numpy' if app.numpy else 'int masks'})"
+        )
+
+
+def generate_dense_classes(tutors: int, layers: int, rng: random.Random) -> list[dict[str, str]]:
+    # Every tutor's every day packed ``layers`` times over with back-to-back sessions of mixed lengths at odd minutes.
+    rows = []
+    for tutor in range(1, tutors + 1):
+        for day in app.DAYS:
+            for _ in range(layers):
+                minute = app.DAY_START + rng.randrange(30)
+                while True:
+                    length = rng.choice((15, 20, 30, 45, 50, 60, 75, 90, 120))
+                    if minute + length > app.DAY_END:
+                        break
+                    rows.append({
+                        "id": app.format_id("C", len(rows) + 1),
+                        "title": "Lesson",
+                        "tutor_id": app.format_id("T", tutor),
+                        "student_id": app.format_id("S", rng.randint(1, tutors * 5)),
+                        "schedule": f"{day} {app.format_minutes(minute)}",
+                        "duration": str(length),
+                    })
+                    minute += length + rng.randrange(15)
+    return rows
+
+
+def bench_overlaps(args):
+    rng = random.Random(args.seed)
+    for layers in args.layers:
+        rows = generate_dense_classes(args.tutors, layers, rng)
+        seconds, cached = timed(lambda: app.CachedDataset("classes", None, app.index_records("classes", rows)))
+        intervals = cached.indexes["intervals"]
+        by_participant = {}
+        for row in cached.records.values():
+            by_participant.setdefault(row.tutor_id, []).append(row)
+            by_participant.setdefault(row.student_id, []).append(row)
+        probes = []
+        for _ in range(args.checks):
+            start = rng.randint(app.DAY_START, app.DAY_END - 5)
+            schedule = f"{rng.choice(app.DAYS)} {app.format_minutes(start)}"
+            probes.append((schedule, str(rng.randint(5, 180)), app.format_id("T", rng.randint(1, args.tutors)), app.format_id("S", rng.randint(1, args.tutors * 5))))
+
+        def interval_checks():
+            return [intervals.conflict(*probe) is not None for probe in probes]
+
+        def participant_scans():
+            # Without the interval lists: every class of the tutor and the student, tested one by one.
+            found = []
+            for schedule, duration, tutor_id, student_id in probes:
+                day, start = app.schedule_slot(schedule)
+                end = start + app.duration_minutes(duration)
+                found.append(any(
+                    row.slot[0] == day and row.minutes()[0] < end and start < row.minutes()[1]
+                    for row in by_participant.get(tutor_id, []) + by_participant.get(student_id, [])
+                ))
+            return found
+
+        indexed, answers = timed(interval_checks)
+        scanned, expected = timed(participant_scans)
+        assert answers == expected, "interval index disagrees with the linear scan"
+        per_day = len(rows) / (args.tutors * len(app.DAYS))
+        print(
+            f"{len(rows):>9} classes ({per_day:6.1f} per tutor-day): build {seconds:6.2f} s | interval check"
+            f" {indexed / len(probes) * 1e6:6.2f} us | participant scan {scanned / len(probes) * 1e6:9.2f} us"
+            f" | {sum(answers)} of {len(probes)} probes clash"
+        )
+
+
+def bench_search(args):
+    rng = random.Random(args.seed)
+    first = ["Ana", "Bilal", "Chen", "Dara", "Emeka", "Farah", "Giulia", "Hiro", "Ines", "Jonah"]
+    last = ["Smith", "Okafor", "Nguyen", "Rossi", "Kowalski", "Haddad", "Tanaka", "Silva"]
+    for count in args.sizes:
+        rows = [
+            {"id": app.format_id("S", number), "name": f"{rng.choice(first)} {rng.choice(last)}", "email": f"student{number}@example.com", "year": str(7 + number % 6)}
+            for number in range(1, count + 1)
+        ]
+        cached = app.CachedDataset("students", None, app.index_records("students", rows))
+        index = cached.indexes["search"]
+        built, _ = timed(index.catch_up)
+        queries = []
+        for _ in range(args.queries):
+            row = rng.choice(rows)
+            queries.append(rng.choice([row["name"], row["email"].split("@")[0], f"{row['name'].split()[0]} {row['id'][-3:]}"]))
+
+        def keystrokes():
+            # Every prefix of every query, as the search box sees them while someone types.
+            return [index.search(query[:length]) for query in queries for length in range(1, len(query) + 1)]
+
+        def linear_scan():
+            return [[row for row in cached.records.values() if app.matches_search("students", row, query)] for query in queries[:3]]
+
+        typed, results = timed(keystrokes)
+        scanned, _ = timed(linear_scan)
+        strokes = len(results)
+        print(
+            f"{count:>9} students: index build {built:6.2f} s | {typed / strokes * 1000:7.3f} ms per keystroke"
+            f" ({strokes} keystrokes) | linear scan {scanned / 3 * 1000:9.2f} ms per query"
+        )
+
+
+def bench_sort(args):
+    rng = random.Random(args.seed)
+    for count in args.sizes:
+        rows = generate_classes(count, rng)
+        for row in rows:
+            row["duration"] = rng.choice(app.DURATIONS)
+        cached = app.CachedDataset("classes", None, app.index_records("classes", rows))
+        order = cached.indexes["order"]
+        first, _ = timed(lambda: order.ordered("schedule", cached.records))
+        order.ordered("duration", cached.records)
+        again, _ = timed(lambda: order.ordered("schedule", cached.records), 10)
+        switch, _ = timed(lambda: (order.ordered("duration", cached.records), order.ordered("schedule", cached.records)), 10)
+
+        def edit_and_resort():
+            for _ in range(args.edits):
+                key = app.format_id("C", rng.randint(1, count))
+                row = dict(cached.records[key], schedule=rng.choice(app.SLOT_SCHEDULES))
+                cached.put(key, app.make_record("classes", row))
+            return order.ordered("schedule", cached.records)
+
+        edited, keys = timed(edit_and_resort)
+        # What the list would pay without the index: parse and sort every row on each click.
+        naive, expected = timed(lambda: [row["id"] for row in sorted(cached.records.values(), key=lambda row: (app.schedule_sort_key(row["schedule"]), row["id"]))])
+        assert keys == expected, "sort index disagrees with sorting the rows"
+        print(
+            f"{count:>9} classes: first sort {first * 1000:8.1f} ms | re-sort {again * 1000:6.3f} ms | switch columns"
+            f" {switch / 2 * 1000:6.3f} ms | {args.edits} edits + re-sort {edited * 1000:7.1f} ms | parse + sort {naive * 1000:8.1f} ms"
+        )
+
+
+SUBJECTS = ["Math", "Physics", "Chemistry", "Biology", "English", "History", "Geography", "French", "Spanish", "Economics", "Computer Science", "Art"]
+
+
+def bench_schedule(args):
+    rng = random.Random(args.seed)
+    for students in args.students:
+        tutors = max(students // 10, 1)
+        directory = Path(tempfile.mkdtemp(prefix="tutorren-bench-"))
+        try:
+            for name in ("users", "classes"):
+                spec = app.DATA_SPECS[name]
+                (directory / spec["filename"]).write_text(",".join(spec["headers"]) + "\n", encoding="utf-8")
+            write_students(directory, students)
+            with (directory / "tutors.csv").open("w", newline="", encoding="utf-8") as fh:
+                writer = csv.writer(fh)
+                writer.writerow(app.DATA_SPECS["tutors"]["headers"])
+                for number in range(1, tutors + 1):
+                    writer.writerow([app.format_id("T", number), f"Tutor {number}", f"tutor{number}@example.com", ";".join(rng.sample(SUBJECTS, 3))])
+            requests = [
+                (line_no, {"student_id": app.format_id("S", rng.randint(1, students)), "subject": rng.choice(SUBJECTS), "sessions": rng.randint(1, 3), "days": ";".join(rng.sample(app.DAYS[:5], 3)) if rng.random() < 0.3 else ""})
+                for line_no in range(2, students * args.requests_per_student + 2)
+            ]
+            app.STORE = app.RecordStore(app.CsvBackend(directory))
+            setup, scheduler = timed(app.Scheduler)
+            seconds, report = timed(lambda: scheduler.run(requests))
+            stored = app.count_records("classes")
+            print(
+                f"{students:>6} students, {tutors:>5} tutors, {len(requests):>6} requests: setup {setup:5.2f} s,"
+                f" plan + write {seconds:6.2f} s, {len(report.assigned)} lessons ({stored} stored), {len(report.errors)} unmet"
+            )
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TutorRen data layer benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+    offsets = commands.add_parser("offsets", help="single-row reads: byte-offset index vs full load + linear search")
+    offsets.add_argument("--rows", type=int, default=500_000)
+    offsets.add_argument("--lookups", type=int, default=1000)
+    offsets.add_argument("--scans", type=int, default=3)
+    offsets.set_defaults(run=bench_offsets)
+    occupancy = commands.add_parser("occupancy", help="schedule conflict checks: occupancy bitmasks vs scanning every class")
+    occupancy.add_argument("--sizes", type=lambda text: [int(part) for part in text.split(",")], default=[100, 10_000, 1_000_000])
+    occupancy.add_argument("--checks", type=int, default=10_000)
+    occupancy.add_argument("--seed", type=int, default=1)
+    occupancy.set_defaults(run=bench_occupancy)
+    overlaps = commands.add_parser("overlaps", help="session overlap checks on densely packed calendars: interval lists vs scanning a participant's classes")
+    overlaps.add_argument("--tutors", type=int, default=100)
+    overlaps.add_argument("--layers", type=lambda text: [int(part) for part in text.split(",")], default=[1, 10, 50])
+    overlaps.add_argument("--checks", type=int, default=10_000)
+    overlaps.add_argument("--seed", type=int, default=1)
+    overlaps.set_defaults(run=bench_overlaps)
+    search = commands.add_parser("search", help="list search box: word-prefix index vs matching every row")
+    search.add_argument("--sizes", type=lambda text: [int(part) for part in text.split(",")], default=[1_000, 10_000, 100_000])
+    search.add_argument("--queries", type=int, default=200)
+    search.add_argument("--seed", type=int, default=1)
+    search.set_defaults(run=bench_search)
+    sort = commands.add_parser("sort", help="list column sorting: cached sort index vs parsing and sorting every row")
+    sort.add_argument("--sizes", type=lambda text: [int(part) for part in text.split(",")], default=[1_000, 10_000, 100_000])
+    sort.add_argument("--edits", type=int, default=100)
+    sort.add_argument("--seed", type=int, default=1)
+    sort.set_defaults(run=bench_sort)
+    schedule = commands.add_parser("schedule", help="bulk scheduler: lesson requests for a term, at several sizes")
+    schedule.add_argument("--students", type=lambda text: [int(part) for part in text.split(",")], default=[500, 2000, 8000])
+    schedule.add_argument("--requests-per-student", type=int, default=2)
+    schedule.add_argument("--seed", type=int, default=1)
+    schedule.set_defaults(run=bench_schedule)
+    args = parser.parse_args(argv)
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
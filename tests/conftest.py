@@ -0,0 +1,18 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app  # noqa: E402
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """An empty CSV-backed store in a temporary directory, installed as app.STORE."""
+    for spec in app.DATA_SPECS.values():
+        app.write_csv_file(tmp_path / spec["filename"], spec["headers"], [])
+    record_store = app.RecordStore(app.CsvBackend(tmp_path))
+    monkeypatch.setattr(app, "STORE", record_store)
+    return record_store
@@ -0,0 +1,138 @@
+import app
+
+
+def lesson(key, schedule, duration="", tutor_id="T-001", student_id="S-001", start_date="", end_date=""):
+    row = dict.fromkeys(app.DATA_SPECS["classes"]["headers"], "")
+    row.update(id=key, title="Math", tutor_id=tutor_id, student_id=student_id, schedule=schedule, duration=duration, start_date=start_date, end_date=end_date)
+    return app.make_record("classes", row)
+
+
+def cell(schedule):
+    return 1 << app.SLOT_BITS[schedule]
+
+
+def index_of(*lessons):
+    index = app.IntervalIndex()
+    for row in lessons:
+        index.add(row["id"], row)
+    return index
+
+
+# ---------- IntervalIndex ----------
+def test_conflict_with_off_grid_session():
+    index = index_of(lesson("C-001", "Mon 10:15", "45"))
+    assert index.conflict("Mon 10:45", "30", "T-001", "S-002")["id"] == "C-001"
+    assert index.conflict("Mon 09:30", "50", "T-002", "S-001")["id"] == "C-001"
+    assert index.conflict("Mon 10:20", "10", "T-001", "S-001")["id"] == "C-001"
+    assert index.conflict("Tue 10:15", "45", "T-001", "S-001") is None
+
+
+def test_touching_sessions_do_not_conflict():
+    index = index_of(lesson("C-001", "Mon 10:15", "45"))
+    assert index.conflict("Mon 10:00", "15", "T-001", "S-001") is None
+    assert index.conflict("Mon 11:00", "60", "T-001", "S-001") is None
+    assert list(index.overlapping("tutor_id", "T-001", 0, 600, 615)) == []
+    assert list(index.overlapping("tutor_id", "T-001", 0, 660, 720)) == []
+    assert [row["id"] for row in index.overlapping("tutor_id", "T-001", 0, 614, 616)] == ["C-001"]
+
+
+def test_overlapping_finds_long_session_starting_well_before():
+    index = index_of(lesson("C-001", "Mon 08:00", "300"), lesson("C-002", "Mon 12:30", "30"), lesson("C-003", "Mon 14:00", "15"))
+    found = [row["id"] for row in index.overlapping("tutor_id", "T-001", 0, 12 * 60 + 45, 14 * 60)]
+    assert found == ["C-001", "C-002"]
+
+
+def test_removal_leaves_longest_stale_but_answers_stay_exact():
+    long_lesson, short_lesson = lesson("C-001", "Mon 08:00", "240"), lesson("C-002", "Mon 13:00", "30")
+    index = index_of(long_lesson, short_lesson)
+    index.remove("C-001", long_lesson)
+    assert index.longest[("tutor_id", "T-001", 0)] == 240
+    assert index.conflict("Mon 09:00", "60", "T-001", "S-001") is None
+    assert [row["id"] for row in index.overlapping("tutor_id", "T-001", 0, 12 * 60 + 30, 13 * 60 + 15)] == ["C-002"]
+    index.remove("C-002", short_lesson)
+    assert ("tutor_id", "T-001", 0) not in index.lists
+    assert ("tutor_id", "T-001", 0) not in index.longest
+    index.remove("C-002", short_lesson)
+
+
+def test_conflict_respects_terms_and_exclude_key():
+    index = index_of(lesson("C-001", "Mon 10:00", "60", start_date="2025-01-06", end_date="2025-06-30"))
+    assert index.conflict("Mon 10:30", "60", "T-001", "S-001", start_date="2025-07-01") is None
+    assert index.conflict("Mon 10:30", "60", "T-001", "S-001", end_date="2025-01-05") is None
+    assert index.conflict("Mon 10:30", "60", "T-001", "S-001", start_date="2025-06-30")["id"] == "C-001"
+    assert index.conflict("Mon 10:30", "60", "T-001", "S-001")["id"] == "C-001"
+    assert index.conflict("Mon 10:30", "60", "T-001", "S-001", exclude_key="C-001") is None
+
+
+# ---------- Occupancy cells ----------
+def test_session_cells_at_day_boundaries():
+    last_time = app.TIME_SLOTS[-1]
+    assert app.session_cells("Mon 08:00", "30") == cell("Mon 08:00")
+    assert app.session_cells(f"Mon {last_time}", "30") == cell(f"Mon {last_time}")
+    # Past closing the session is clipped, never spilling into the next day.
+    assert app.session_cells(f"Mon {last_time}", "120") == cell(f"Mon {last_time}")
+    assert app.session_cells(f"Sun {last_time}", "30") == 1 << len(app.SLOT_SCHEDULES) - 1
+    assert app.session_cells("Mon 07:00", "60") == 0
+    assert app.session_cells("Mon 07:30", "60") == cell("Mon 08:00")
+    assert app.session_cells("Mon 21:00", "30") == 0
+    assert app.session_cells("Someday 10:00", "30") == 0
+
+
+def test_session_cells_off_grid():
+    assert app.session_cells("Mon 10:15", "30") == cell("Mon 10:00") | cell("Mon 10:30")
+    assert app.session_cells("Mon 10:15", "15") == cell("Mon 10:00")
+    assert app.session_cells("Mon 10:00") == cell("Mon 10:00") | cell("Mon 10:30")
+
+
+def test_free_starts_stay_within_one_day():
+    per_day = len(app.TIME_SLOTS)
+    last_time = app.TIME_SLOTS[-1]
+    starts = app.free_starts(app.FULL_WEEK, 2)
+    assert not starts & cell(f"Mon {last_time}")
+    assert starts & cell(f"Mon {app.TIME_SLOTS[-2]}")
+    assert app.free_starts(app.FULL_WEEK, per_day) == sum(cell(f"{day} {app.TIME_SLOTS[0]}") for day in app.DAYS)
+    assert app.free_starts(app.FULL_WEEK, per_day + 1) == 0
+    assert app.free_starts(cell(f"Mon {last_time}") | cell("Tue 08:00"), 2) == 0
+    assert app.free_starts(cell("Mon 10:00"), 1) == cell("Mon 10:00")
+
+
+def test_check_session_hours():
+    assert app.check_session("Mon 20:00", "60") == ""
+    assert app.check_session("Mon 20:00") == ""
+    assert app.check_session("Mon 10:15", "45") == ""
+    assert app.check_session("Mon 20:30", "60").startswith("Sessions must fall between")
+    assert app.check_session("Mon 20:45", "30").startswith("Sessions must fall between")
+    assert app.check_session("Mon 07:30", "30").startswith("Sessions must fall between")
+    assert app.check_session("Mon 9:00", "30").startswith("Schedule")
+    assert app.check_session("Mon 10:00", "0") == "Duration must be a whole number of minutes."
+
+
+# ---------- Stored classes ----------
+def test_find_schedule_conflict(store):
+    store.append_many("classes", [
+        lesson("C-001", "Mon 10:00", "60"),
+        lesson("C-002", "Mon 10:15", "15", tutor_id="T-002", student_id="S-002"),
+        lesson("C-003", "Tue 10:00", "60", tutor_id="T-003", student_id="S-003", end_date="2025-06-30"),
+    ])
+    assert app.find_schedule_conflict("Mon 10:30", "T-001", "S-009", duration="30")["id"] == "C-001"
+    assert app.find_schedule_conflict("Mon 10:30", "T-009", "S-001", duration="30")["id"] == "C-001"
+    assert app.find_schedule_conflict("Mon 10:30", "T-001", "S-001", exclude_key="C-001", duration="30") is None
+    assert app.find_schedule_conflict("Mon 11:00", "T-001", "S-001", duration="30") is None
+    # Shares the 10:00 cell with C-002 but ends as it starts.
+    assert app.find_schedule_conflict("Mon 10:00", "T-002", "S-002", duration="15") is None
+    assert app.find_schedule_conflict("Tue 10:00", "T-003", "S-003", start_date="2025-07-01") is None
+    assert app.find_schedule_conflict("Tue 10:00", "T-003", "S-003", start_date="2025-06-01")["id"] == "C-003"
+    assert app.find_schedule_conflict("Mon 20:30", "T-001", "S-001", duration="60") is None
+
+
+def test_ended_classes_do_not_block_a_later_term(store):
+    store.append_many("classes", [
+        lesson(f"C-{number:03d}", schedule, "30", end_date="2025-06-30") for number, schedule in enumerate(app.SLOT_SCHEDULES, start=1)
+    ])
+    assert app.class_occupancy().busy("T-001") == app.FULL_WEEK
+    assert app.term_cells("tutor_id", "T-001", "2025-07-01") == 0
+    scheduler = app.Scheduler()
+    assert scheduler.suggest("S-001", tutor_id="T-001") is None
+    assert scheduler.suggest("S-001", tutor_id="T-001", start_date="2025-07-01") == ("T-001", "Mon 08:00")
+    scheduler.book("T-001", "S-001", "Mon 08:00", "30")
+    assert scheduler.suggest("S-001", tutor_id="T-001", start_date="2025-07-01") == ("T-001", "Mon 08:30")
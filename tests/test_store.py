@@ -0,0 +1,173 @@
+import csv
+import json
+import threading
+
+import pytest
+
+import app
+
+
+def student(key, name="Ada", year="9"):
+    return {"id": key, "name": name, "email": f"{key.lower()}@example.com", "year": year}
+
+
+def stored_ids(tmp_path):
+    return sorted(app.CsvBackend(tmp_path).load("students"))
+
+
+def base_ids(tmp_path):
+    # The CSV alone, without the journal that load() replays over it.
+    with (tmp_path / "students.csv").open(newline="", encoding="utf-8") as fh:
+        return sorted(row["id"] for row in csv.DictReader(fh))
+
+
+def wait_for_compaction():
+    for thread in threading.enumerate():
+        if thread.name.startswith("compact-"):
+            thread.join()
+
+
+def fail_once(monkeypatch, backend):
+    write = backend.write
+
+    def failing(*args):
+        monkeypatch.setattr(backend, "write", write)
+        raise OSError("disk full")
+
+    monkeypatch.setattr(backend, "write", failing)
+
+
+# ---------- Journal ----------
+def test_journal_replays_over_base(store, tmp_path):
+    journaled = app.RecordStore(app.CsvBackend(tmp_path, journal=True))
+    journaled.append_many("students", [student("S-001"), student("S-002"), student("S-003")])
+    journaled.update("students", "S-002", student("S-002", year="10"))
+    journaled.delete("students", "S-003")
+    assert journaled.backend.journal_path("students").exists()
+    assert base_ids(tmp_path) == []
+    fresh = app.RecordStore(app.CsvBackend(tmp_path, journal=True))
+    assert sorted(fresh.records("students")) == ["S-001", "S-002"]
+    assert fresh.get("students", "S-002")["year"] == "10"
+
+
+def test_compaction_folds_journal_into_base(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "JOURNAL_COMPACT_MIN_ENTRIES", 2)
+    journaled = app.RecordStore(app.CsvBackend(tmp_path, journal=True))
+    journaled.append_many("students", [student(f"S-{number:03d}") for number in range(1, 5)])
+    wait_for_compaction()
+    assert base_ids(tmp_path) == ["S-001", "S-002", "S-003", "S-004"]
+    assert not journaled.backend.journal_path("students").exists()
+    journaled.append("students", student("S-005"))
+    wait_for_compaction()
+    assert sorted(app.RecordStore(app.CsvBackend(tmp_path, journal=True)).records("students")) == [f"S-{n:03d}" for n in range(1, 6)]
+
+
+def test_plain_csv_mode_folds_leftover_journal_before_writing(store, tmp_path):
+    app.RecordStore(app.CsvBackend(tmp_path, journal=True)).append("students", student("S-001"))
+    store.append("students", student("S-002"))
+    assert not store.backend.journal_path("students").exists()
+    assert base_ids(tmp_path) == ["S-001", "S-002"]
+
+
+# ---------- Write-behind ----------
+def test_write_behind_holds_changes_until_flush(store, tmp_path):
+    store.write_delay = 60
+    store.append("students", student("S-001"))
+    store.update("students", "S-001", student("S-001", year="10"))
+    assert store.get("students", "S-001")["year"] == "10"
+    assert store.has_pending_writes("students")
+    assert stored_ids(tmp_path) == []
+    store.flush()
+    assert not store.has_pending_writes()
+    assert app.RecordStore(app.CsvBackend(tmp_path)).get("students", "S-001")["year"] == "10"
+
+
+def test_failed_flush_keeps_changes_queued(store, tmp_path, monkeypatch):
+    store.write_delay = 60
+    store.append("students", student("S-001"))
+    fail_once(monkeypatch, store.backend)
+    with pytest.raises(OSError):
+        store.flush()
+    assert store.has_pending_writes("students")
+    store.flush()
+    assert stored_ids(tmp_path) == ["S-001"]
+
+
+def test_failed_immediate_write_keeps_earlier_queued_changes(store, tmp_path, monkeypatch):
+    store.write_delay = 60
+    store.append("students", student("S-001"))
+    store.write_delay = None
+    fail_once(monkeypatch, store.backend)
+    with pytest.raises(OSError):
+        store.append("students", student("S-002"))
+    assert store.has_pending_writes("students")
+    store.flush()
+    assert stored_ids(tmp_path) == ["S-001"]
+
+
+# ---------- Metadata ----------
+def sidecar(tmp_path):
+    return json.loads((tmp_path / "students.meta.json").read_text(encoding="utf-8"))
+
+
+def test_sidecar_tracks_edits(store, tmp_path):
+    store.append_many("students", [student("S-001"), student("S-002")])
+    store.delete("students", "S-001")
+    assert sidecar(tmp_path)["rows"] == 1
+    rebuilt = app.build_metadata("students", app.CsvBackend(tmp_path).load("students").values())
+    assert store.metadata("students")["hash"] == rebuilt["hash"]
+
+
+def test_sidecar_matches_file_after_pending_edits_replay_over_another_writer(store, tmp_path):
+    first = app.RecordStore(app.CsvBackend(tmp_path), write_delay=60)
+    second = app.RecordStore(app.CsvBackend(tmp_path))
+    first.metadata("students")
+    first.append("students", student("S-001"))
+    second.append("students", student("S-002"))
+    first.flush()
+    assert stored_ids(tmp_path) == ["S-001", "S-002"]
+    assert sidecar(tmp_path)["rows"] == 2
+    assert app.RecordStore(app.CsvBackend(tmp_path)).metadata("students")["rows"] == 2
+
+
+# ---------- Optimistic edits ----------
+def test_stale_edits_raise_conflict(store, tmp_path):
+    store.append("students", student("S-001"))
+    opened = dict(store.get("students", "S-001"))
+    app.RecordStore(app.CsvBackend(tmp_path)).update("students", "S-001", student("S-001", name="Grace"))
+    with pytest.raises(app.ConflictError):
+        store.update("students", "S-001", student("S-001", year="11"), expected=opened)
+    with pytest.raises(app.ConflictError):
+        store.delete("students", "S-001", expected=opened)
+    latest = dict(store.get("students", "S-001"))
+    assert latest["name"] == "Grace"
+    store.update("students", "S-001", student("S-001", name="Grace", year="11"), expected=latest)
+    assert store.get("students", "S-001")["year"] == "11"
+
+
+def test_edit_of_deleted_row_raises_conflict(store, tmp_path):
+    store.append("students", student("S-001"))
+    opened = dict(store.get("students", "S-001"))
+    app.RecordStore(app.CsvBackend(tmp_path)).delete("students", "S-001")
+    with pytest.raises(app.ConflictError, match="deleted"):
+        store.update("students", "S-001", student("S-001", year="11"), expected=opened)
+
+
+# ---------- SQLite migration ----------
+def test_migrate_to_sqlite_copies_rows_and_journal(store, tmp_path):
+    store.append_many("students", [student("S-001"), student("S-002")])
+    app.RecordStore(app.CsvBackend(tmp_path, journal=True)).update("students", "S-002", student("S-002", year="12"))
+    db_path = tmp_path / "school.db"
+    copied = app.migrate_to_sqlite(tmp_path, db_path)
+    assert copied["students"] == 2
+    migrated = app.RecordStore(app.SqliteBackend(db_path))
+    assert sorted(migrated.records("students")) == ["S-001", "S-002"]
+    assert migrated.get("students", "S-002")["year"] == "12"
+
+
+def test_migrate_to_sqlite_refuses_repeated_keys(store, tmp_path):
+    app.write_csv_file(tmp_path / "students.csv", app.DATA_SPECS["students"]["headers"], [student("S-001"), student("S-001", name="Grace")])
+    db_path = tmp_path / "school.db"
+    with pytest.raises(ValueError, match="repeats id S-001"):
+        app.migrate_to_sqlite(tmp_path, db_path)
+    assert not db_path.exists()